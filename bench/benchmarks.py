@@ -0,0 +1,267 @@
+"""
+This module benchmarks the main steps of the pipeline on
+synthetic data of growing sizes and saves the results as .json,
+so they can be compared between commits.
+
+For each size, a synthetic corpus is generated in a temporary
+directory. Each benchmark then runs in its own process with that
+directory as the cwd, so it reads the synthetic data through the
+usual relative paths and its memory is measured alone. Token caches
+are cleared before each benchmark, so every one of them starts cold.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+import nltk
+
+from bench.synthetic import generate_corpus
+from bench.synthetic import generate_raw_csvs
+from bench.synthetic import generate_search_pages
+from bench.synthetic import write_training_csv
+from classify.classify import classify_corpus
+from classify.classify import load_training_data
+from classify.classify import train_models
+from classify.classify import train_repositories
+from classify.features import get_feature_mode
+from classify.features import set_feature_mode
+from classify.Verdict import TOKEN_CACHE
+from classify.Verdict import get_tokenizer
+from classify.Verdict import set_tokenizer
+from classify.Verdict import Verdict
+from constants import BENCH_DIR
+from constants import BENCH_SIZES
+from constants import FEATS_LEN
+from constants import FULL_TRAIN_DATA_PATH
+from constants import OUT_DIR
+from constants import RAW_DIR
+from constants import TOKENS_DIR
+from constants import TRAIN_DIR
+from constants import TXT_DIR
+from corpus import list_verdict_ids
+from corpus import read_verdict
+from csv_utils import merge_csvs
+from scrap.scrap import parse_page
+
+
+Benchmark = Tuple[Callable[[], None], int]
+
+
+def bench_tokens(size: int) -> Benchmark:
+    """
+    Tokenizes every verdict, without the token cache.
+    """
+    verdicts = [Verdict(read_verdict(full_id)) for full_id in list_verdict_ids()]
+
+    def run():
+        for verdict in verdicts:
+            verdict.tokens
+
+    return run, len(verdicts)
+
+
+def bench_features(size: int) -> Benchmark:
+    """
+    Gets the features dict of every verdict for the FEATS_LEN most common words.
+    """
+    verdicts = [Verdict(read_verdict(full_id)) for full_id in list_verdict_ids()]
+    tokens = [token for verdict in verdicts[:100] for token in verdict.tokens]
+    words = list(nltk.FreqDist(tokens))[:FEATS_LEN]
+
+    def run():
+        for verdict in verdicts:
+            verdict.features(words)
+
+    return run, len(verdicts)
+
+
+def bench_training(size: int) -> Benchmark:
+    """
+    Builds the vocabularies and trains the classifiers of both types, as train_models does.
+    """
+    crime_data, result_data = load_training_data("")
+
+    def run():
+        train_repositories(crime_data, result_data, 0.75)
+
+    return run, size
+
+
+def bench_hashed_training(size: int) -> Benchmark:
+    """
+    Trains the classifiers of both types on hashed features.
+    """
+    set_feature_mode("hashing")
+    return bench_training(size)
+
+
+def bench_classify_corpus(size: int) -> Benchmark:
+    """
+    Classifies the whole corpus, serially, with models trained beforehand.
+    """
+    models, _ = train_models("", 0.75)
+    shutil.rmtree(TOKENS_DIR, ignore_errors=True)
+    TOKEN_CACHE.memory.clear()
+
+    def run():
+        for _ in classify_corpus(*models):
+            pass
+
+    return run, size
+
+
+def bench_parse_page(size: int) -> Benchmark:
+    """
+    Parses search pages listing size results in total.
+    """
+    pages = generate_search_pages(size)
+
+    def run():
+        for page in pages:
+            parse_page(page, "bench")
+
+    return run, size
+
+
+def bench_merge_csvs(size: int) -> Benchmark:
+    """
+    Merges raw .csv files with size unique verdicts and some repeated ones.
+    """
+    lines = generate_raw_csvs(RAW_DIR, size)
+
+    def run():
+        merge_csvs()
+
+    return run, lines
+
+
+BENCHMARKS: Dict[str, Callable[[int], Benchmark]] = {
+    "tokens": bench_tokens,
+    "features": bench_features,
+    "training": bench_training,
+    "hashed_training": bench_hashed_training,
+    "classify_corpus": bench_classify_corpus,
+    "parse_page": bench_parse_page,
+    "merge_csvs": bench_merge_csvs,
+}
+
+
+def prepare_workdir(workdir: str, size: int):
+    """
+    Generates the synthetic corpus and its training data in workdir.
+    """
+    os.chdir(workdir)
+    for folder in (TXT_DIR, TRAIN_DIR, RAW_DIR, OUT_DIR):
+        os.makedirs(folder, exist_ok=True)
+    labels = generate_corpus(TXT_DIR, size)
+    write_training_csv(FULL_TRAIN_DATA_PATH, labels)
+
+
+def run_benchmark(name: str, workdir: str, size: int, tokenizer: str, feature_mode: str) -> Dict:
+    """
+    Sets the benchmark up and times it. Returns its wall and cpu time,
+    throughput, peak resident memory and the memory growth while timed.
+    Runs in its own process, with workdir as the cwd and the tokenizer
+    and feature mode selected in the parent process.
+    """
+    os.chdir(workdir)
+    set_tokenizer(tokenizer)
+    set_feature_mode(feature_mode)
+    run, items = BENCHMARKS[name](size)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start, start_cpu = time.perf_counter(), time.process_time()
+    run()
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - start_cpu
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "benchmark": name,
+        "size": size,
+        "items": items,
+        "seconds": elapsed,
+        "cpu_seconds": cpu,
+        "items_per_sec": items / elapsed if elapsed else 0,
+        "peak_rss_kb": peak_rss,
+        "rss_growth_kb": peak_rss - baseline_rss,
+    }
+
+
+def run_benchmarks(sizes: List[int] = BENCH_SIZES, names: List[str] = None, folder: str = BENCH_DIR) -> str:
+    """
+    Runs the named benchmarks, or all of them, for each size
+    and saves the results in a .json file in folder.
+    Returns the results file path.
+    """
+    names = names or list(BENCHMARKS)
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "started_at": datetime.utcnow().isoformat(),
+        "results": [],
+    }
+    for size in sizes:
+        workdir = tempfile.mkdtemp(prefix=f"bench_{size}_")
+        try:
+            with ProcessPoolExecutor(1) as executor:
+                executor.submit(prepare_workdir, workdir, size).result()
+            for name in names:
+                shutil.rmtree(os.path.join(workdir, TOKENS_DIR), ignore_errors=True)
+                with ProcessPoolExecutor(1) as executor:
+                    result = executor.submit(run_benchmark, name, workdir, size, get_tokenizer(), get_feature_mode()).result()
+                report["results"].append(result)
+                print(
+                    f"\n{name} x {size}: {result['seconds']:.2f}s, "
+                    f"{result['items_per_sec']:.1f} items/s, "
+                    f"peak rss {result['peak_rss_kb']:.0f} kB"
+                )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(folder, exist_ok=True)
+    now = str(datetime.utcnow().timestamp()).replace(".", "")
+    filepath = os.path.join(folder, f"bench_{now}.json")
+    with open(filepath, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved at {filepath}")
+    return filepath
+
+
+def compare_results(baseline_path: str, results_path: str):
+    """
+    Prints how the throughput of each benchmark in results_path
+    changed from the baseline_path one, for the sizes in both.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["size"]): r for r in json.load(f)["results"]}
+    with open(results_path) as f:
+        results = json.load(f)["results"]
+
+    for result in results:
+        base = baseline.get((result["benchmark"], result["size"]))
+        if base is None or not base["items_per_sec"]:
+            continue
+        speedup = result["items_per_sec"] / base["items_per_sec"]
+        print(f"{result['benchmark']} x {result['size']}: {speedup:.2f}x the baseline throughput")
+
+
+def get_commit() -> str:
+    """
+    Returns the current git commit hash, or "" outside of a git repository.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
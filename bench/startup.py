@@ -0,0 +1,66 @@
+"""
+This module measures the startup time of each command,
+that is, how long a fresh interpreter takes to import main
+and the modules the command imports before running,
+and checks it against the command budget in STARTUP_BUDGETS.
+"""
+
+from typing import Dict
+from typing import List
+import subprocess
+import sys
+import time
+
+from constants import STARTUP_BUDGETS
+from constants import STARTUP_RUNS
+
+
+# The modules imported by each command branch of main.switch_args
+COMMAND_MODULES: Dict[str, List[str]] = {
+    "scrap": ["scrap.scrap"],
+    "parsers": ["scrap.parsecheck"],
+    "tokenizers": ["classify.tokencheck"],
+    "features": ["classify.featurecheck"],
+    "merge": ["csv_utils"],
+    "catalogue": ["catalogue"],
+    "download": ["scrap.scrap"],
+    "standin": ["scrap.standin"],
+    "pack": ["corpus"],
+    "human": ["classify.human"],
+    "labels": ["labels"],
+    "train": ["classify.classify"],
+    "classify": ["classify.classify"],
+    "bench": ["bench.benchmarks"],
+    "startup": ["bench.startup"],
+    "serve": ["classify.classify", "classify.service"],
+}
+
+
+def measure_startup(modules: List[str], runs: int = STARTUP_RUNS) -> float:
+    """
+    Returns the shortest time, in seconds, a fresh interpreter
+    took to import main and the modules, over runs tries.
+    """
+    code = "; ".join(f"import {module}" for module in ["main", *modules])
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def check_startup() -> List[str]:
+    """
+    Measures the startup time of each command and prints it
+    along with its budget. Returns the commands over budget.
+    """
+    over_budget = []
+    for command, modules in COMMAND_MODULES.items():
+        seconds = measure_startup(modules)
+        budget = STARTUP_BUDGETS[command]
+        status = "ok" if seconds <= budget else "OVER BUDGET"
+        print(f"{command}: {seconds:.3f}s of {budget:.1f}s, {status}")
+        if seconds > budget:
+            over_budget.append(command)
+    return over_budget
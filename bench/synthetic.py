@@ -0,0 +1,171 @@
+"""
+This module generates synthetic data shaped like the scrapped one:
+Portuguese verdict texts named by full_id as in TXT_DIR, their
+training labels, search result pages and raw search .csv files.
+
+Generation is seeded, so the same arguments always produce
+the same data. Each text leans on the vocabulary of its crime
+and result types, so classifiers trained on it learn something.
+"""
+
+from typing import List
+from typing import Tuple
+import os
+import random
+
+from classify.Enums import CrimeTypeEnum
+from classify.Enums import ResultTypeEnum
+from constants import BASE_URL
+from constants import BENCH_DOC_WORDS
+from constants import BENCH_DUPLICATES
+from constants import BENCH_PAGE_RESULTS
+from constants import BENCH_SIGNAL
+from constants import CHECKPOINT_LINES
+
+
+COMMON_WORDS = (
+    "o a os as de do da dos das em no na que e para com por se ao réu ré autos processo "
+    "juiz juízo vara comarca belo horizonte ministério público denúncia acusado acusada "
+    "defesa testemunha testemunhas depoimento interrogatório prova provas fls artigo código "
+    "penal lei audiência instrução julgamento sentença relatório fundamentação decido "
+    "dispositivo fato fatos data local policial militar inquérito boletim ocorrência "
+    "materialidade autoria dolo conduta tipicidade ilicitude culpabilidade intimem-se "
+    "publique-se registre-se cumpra-se custas processuais trânsito julgado"
+).split()
+
+CRIME_WORDS = {
+    CrimeTypeEnum.OUTROS: (
+        "lesão corporal ameaça violência doméstica tráfico drogas entorpecentes porte arma "
+        "fogo embriaguez volante desacato resistência homicídio tentativa injúria"
+    ).split(),
+    CrimeTypeEnum.PATRIMONIO: (
+        "furto roubo subtração coisa alheia móvel patrimônio receptação estelionato "
+        "celular carteira veículo res furtiva grave ameaça emprego dano qualificado"
+    ).split(),
+}
+
+RESULT_WORDS = {
+    ResultTypeEnum.CONDENATORIA: (
+        "condeno condenado condenação pena privativa liberdade reclusão detenção regime "
+        "semiaberto fechado aberto multa dias-multa dosimetria procedente"
+    ).split(),
+    ResultTypeEnum.ABSOLUTORIA: (
+        "absolvo absolvido absolvição improcedente insuficiência provas dúvida in dubio "
+        "pro reo atipicidade excludente legítima defesa"
+    ).split(),
+    ResultTypeEnum.NEUTRA: (
+        "extinção punibilidade prescrição decadência arquivamento suspensão condicional "
+        "transação penal homologo acordo perempção"
+    ).split(),
+}
+
+Label = Tuple[str, int, int]
+
+
+def get_full_id(rng: random.Random) -> str:
+    """
+    Returns a full_id made of a file id and a file hash, as parse_page builds it.
+    """
+    return f"{rng.randint(10**6, 10**7 - 1)}{rng.getrandbits(128):032x}"
+
+
+def generate_text(rng: random.Random, crime: CrimeTypeEnum, result: ResultTypeEnum, words: int) -> str:
+    """
+    Returns a verdict text of about words words, a share of
+    BENCH_SIGNAL of them taken from its crime and result vocabulary.
+    """
+    vocabulary = CRIME_WORDS[crime] + RESULT_WORDS[result]
+    tokens = [
+        rng.choice(vocabulary) if rng.random() < BENCH_SIGNAL else rng.choice(COMMON_WORDS)
+        for _ in range(words)
+    ]
+    sentences = [" ".join(tokens[i:i + 15]).capitalize() + "." for i in range(0, len(tokens), 15)]
+    paragraphs = [" ".join(sentences[i:i + 6]) for i in range(0, len(sentences), 6)]
+    return "SENTENÇA\n\n" + "\n\n".join(paragraphs) + "\n"
+
+
+def generate_corpus(folder: str, count: int, words: int = BENCH_DOC_WORDS, seed: int = 0) -> List[Label]:
+    """
+    Writes count verdict texts as {full_id}.txt files in folder.
+    Returns the (full_id, crime_type, result_type) of each one.
+    """
+    rng = random.Random(seed)
+    crimes = list(CrimeTypeEnum)
+    results = list(ResultTypeEnum)
+    labels = []
+    os.makedirs(folder, exist_ok=True)
+    for _ in range(count):
+        full_id = get_full_id(rng)
+        crime, result = rng.choice(crimes), rng.choice(results)
+        with open(os.path.join(folder, f"{full_id}.txt"), "w") as f:
+            f.write(generate_text(rng, crime, result, words))
+        labels.append((full_id, crime.value, result.value))
+    return labels
+
+
+def write_training_csv(filepath: str, labels: List[Label]):
+    """
+    Writes the labels as a full_id;crime_type;result_type training data file.
+    """
+    with open(filepath, "w") as f:
+        f.write("\n".join(f"{full_id};{crime};{result}" for full_id, crime, result in labels))
+
+
+def generate_search_pages(count: int, seed: int = 0, per_page: int = BENCH_PAGE_RESULTS) -> List[str]:
+    """
+    Returns search result pages listing count results in
+    total, with the markup the parser engines read.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for start in range(0, count, per_page):
+        rows = [get_search_row(rng, i) for i in range(start, min(start + per_page, count))]
+        pages.append(
+            "<html><head><title>Sentenças</title></head><body><div id=\"conteudo\">"
+            f"<table id=\"tabelaSentenca\">{''.join(rows)}</table></div></body></html>"
+        )
+    return pages
+
+
+def get_search_row(rng: random.Random, i: int) -> str:
+    file_id, file_hash = str(rng.randint(10**6, 10**7 - 1)), f"{rng.getrandbits(128):032x}"
+    return (
+        "<tr><td><div class=\"caixa_processo\"><a href=\"javascript:void(0)\">"
+        f"<div> 1.0024.{i % 100:02d}.{i:06d}-1 </div><div>{i:07d}-11.2011.8.13.0024</div></a></div>"
+        f"<div class=\"corpo\"><b>Juiz:</b> Juiz de Direito {i % 50}</div>"
+        f"<div class=\"corpo\">Data da Publicação: {i % 28 + 1:02d}/02/2012</div>"
+        f"<span class=\"icone\"><img src=\"img/pdf.gif\" onclick=\"abrirArquivo('1','{file_id}','{file_hash}')\" /></span>"
+        "</td></tr>"
+    )
+
+
+def generate_raw_csvs(
+    folder: str,
+    count: int,
+    seed: int = 0,
+    duplicates: float = BENCH_DUPLICATES,
+    lines_per_file: int = CHECKPOINT_LINES
+) -> int:
+    """
+    Writes raw search .csv files in folder with count unique verdicts,
+    plus a share of duplicates lines repeating earlier full_ids.
+    Returns the number of lines written.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        full_id = get_full_id(rng)
+        file_id, file_hash = full_id[:7], full_id[7:]
+        lines.append(
+            f"bench;1.0024.12.{i:06d}-1;{i:07d}1120118130024;Juiz de Direito {i % 50};"
+            f"{i % 28 + 1:02d}/02/2012;{full_id};{file_id};{file_hash};"
+            f"{BASE_URL}downloadArquivo.do?sistemaOrigem=1&codigoArquivo={file_id}&hashArquivo={file_hash}"
+        )
+    lines.extend(rng.choice(lines) for _ in range(int(count * duplicates)))
+    rng.shuffle(lines)
+
+    os.makedirs(folder, exist_ok=True)
+    for n, start in enumerate(range(0, len(lines), lines_per_file)):
+        with open(os.path.join(folder, f"raw_bench_{n:06d}.csv"), "w") as f:
+            f.write("\n".join(lines[start:start + lines_per_file]))
+    return len(lines)
@@ -0,0 +1,202 @@
+"""
+This is a module for the verdicts catalogue, an indexed SQLite
+database with one row per full_id holding the verdict metadata,
+its download state, content hash and latest classification.
+
+The catalogue is created by the catalogue command from data.csv
+and the stored corpus. Once it exists, it is kept up to date by
+the scrap, merge, download and classify commands and queried
+instead of loading data.csv and listing the corpus.
+"""
+
+from __future__ import annotations
+from datetime import datetime
+from hashlib import sha1
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import TYPE_CHECKING
+from typing import Tuple
+import os
+import sqlite3
+import threading
+
+from constants import CATALOGUE_PATH
+from constants import CSV_DATA_PATH
+from constants import RAW_CSV_NAMES
+from corpus import list_verdict_ids
+from corpus import read_verdict
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+NOT_DOWNLOADED = 0
+DOWNLOADED = 1
+DOWNLOAD_FAILED = -1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    full_id TEXT PRIMARY KEY,
+    court TEXT,
+    old_num TEXT,
+    cnj_num TEXT,
+    judge TEXT,
+    pub_date TEXT,
+    file_id TEXT,
+    file_hash TEXT,
+    url TEXT,
+    download_state INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    crime_type TEXT,
+    crime_confidence TEXT,
+    result_type TEXT,
+    result_confidence TEXT,
+    classified_at TEXT
+);
+CREATE INDEX IF NOT EXISTS verdicts_state ON verdicts (download_state, classified_at);
+"""
+
+CONNECTIONS = threading.local()
+
+
+def catalogue_exists() -> bool:
+    return os.path.exists(CATALOGUE_PATH)
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Returns this thread connection to the catalogue, creating its tables if needed.
+    """
+    connection = getattr(CONNECTIONS, "connection", None)
+    if connection is None:
+        connection = sqlite3.connect(CATALOGUE_PATH, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        CONNECTIONS.connection = connection
+    return connection
+
+
+def build_catalogue():
+    """
+    Creates or refreshes the catalogue from data.csv and
+    marks every verdict already in the corpus as downloaded.
+    """
+    with open(CSV_DATA_PATH) as f:
+        upsert_verdicts(f)
+
+    downloaded = list_verdict_ids()
+    with get_connection() as connection:
+        for i, full_id in enumerate(downloaded):
+            print(f"Hashing document #{i}", end="\r")
+            connection.execute(
+                "UPDATE verdicts SET download_state = ?, content_hash = ? WHERE full_id = ?",
+                (DOWNLOADED, get_content_hash(read_verdict(full_id)), full_id)
+            )
+    print(f"\nCatalogued {count_verdicts()} verdicts at {CATALOGUE_PATH}")
+
+
+def upsert_verdicts(lines: Iterable[str]):
+    """
+    Inserts or updates the metadata of the verdicts from raw
+    ';' separated csv lines, keeping their download and classification state.
+    """
+    fields = len(RAW_CSV_NAMES)
+    rows = (line.strip().split(";") for line in lines)
+    rows = (row for row in rows if len(row) == fields)
+    columns = ", ".join(RAW_CSV_NAMES)
+    updates = ", ".join(f"{name} = excluded.{name}" for name in RAW_CSV_NAMES if name != "full_id")
+    with get_connection() as connection:
+        connection.executemany(
+            f"INSERT INTO verdicts ({columns}) VALUES ({', '.join('?' * fields)}) "
+            f"ON CONFLICT (full_id) DO UPDATE SET {updates}",
+            rows
+        )
+
+
+def set_download_state(full_id: str, state: int, text: str = ""):
+    """
+    Records the download state of the verdict and the hash of its
+    text. Without a text, the recorded hash is kept.
+    """
+    content_hash = get_content_hash(text) if text else None
+    with get_connection() as connection:
+        connection.execute(
+            "UPDATE verdicts SET download_state = ?, content_hash = COALESCE(?, content_hash) "
+            "WHERE full_id = ?",
+            (state, content_hash, full_id)
+        )
+
+
+def track_classifications(lines: Iterable[str], batch_size: int = 500) -> Iterator[str]:
+    """
+    Yields the classify output lines unchanged while recording
+    them as the latest classification of each verdict.
+    """
+    batch = []
+    for line in lines:
+        batch.append(line)
+        yield line
+        if len(batch) == batch_size:
+            record_classifications(batch)
+            batch = []
+    record_classifications(batch)
+
+
+def record_classifications(lines: List[str]):
+    now = datetime.utcnow().isoformat()
+    rows = ([*line.split(";")[1:], now, line.split(";")[0]] for line in lines)
+    with get_connection() as connection:
+        connection.executemany(
+            "UPDATE verdicts SET crime_type = ?, crime_confidence = ?, result_type = ?, "
+            "result_confidence = ?, classified_at = ? WHERE full_id = ?",
+            rows
+        )
+
+
+def get_pending_downloads() -> List[Tuple[str, str]]:
+    """
+    Returns the (full_id, url) of the verdicts not downloaded yet.
+    """
+    cursor = get_connection().execute(
+        "SELECT full_id, url FROM verdicts WHERE download_state = ?", (NOT_DOWNLOADED,)
+    )
+    return cursor.fetchall()
+
+
+def get_downloaded_ids() -> List[str]:
+    cursor = get_connection().execute(
+        "SELECT full_id FROM verdicts WHERE download_state = ?", (DOWNLOADED,)
+    )
+    return [row[0] for row in cursor]
+
+
+def get_unclassified_ids() -> List[str]:
+    """
+    Returns the full_id of the downloaded verdicts never classified.
+    """
+    cursor = get_connection().execute(
+        "SELECT full_id FROM verdicts WHERE download_state = ? AND classified_at IS NULL",
+        (DOWNLOADED,)
+    )
+    return [row[0] for row in cursor]
+
+
+def get_downloaded_dataframe() -> pd.DataFrame:
+    """
+    Returns the metadata of the downloaded verdicts, with the data.csv columns.
+    """
+    import pandas as pd
+    return pd.read_sql_query(
+        f"SELECT {', '.join(RAW_CSV_NAMES)} FROM verdicts WHERE download_state = ?",
+        get_connection(),
+        params=(DOWNLOADED,)
+    )
+
+
+def count_verdicts() -> int:
+    return get_connection().execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+
+def get_content_hash(text: str) -> str:
+    return sha1(text.encode()).hexdigest()
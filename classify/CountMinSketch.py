@@ -0,0 +1,44 @@
+"""
+This module provides the CountMinSketch class which is used
+to estimate how often each token was seen in fixed memory.
+"""
+
+from hashlib import blake2b
+from typing import List
+
+import numpy as np
+
+
+class CountMinSketch:
+    """
+    depth rows of width counters. Each token is hashed to one
+    counter of each row, and its estimate is the smallest of them,
+    which is never below its true count. Each row salts blake2b
+    with its number, so its hashes are independent of the others.
+    """
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.rows = np.arange(depth)[:, np.newaxis]
+
+    def columns(self, tokens: List[str]) -> np.ndarray:
+        """
+        Returns the depth x tokens array of the counter each token hashes to in each row.
+        """
+        encoded = [token.encode() for token in tokens]
+        return np.array(
+            [
+                [int.from_bytes(blake2b(token, digest_size=8, salt=salt).digest(), "little") % self.width for token in encoded]
+                for salt in (row.to_bytes(8, "little") for row in range(len(self.table)))
+            ],
+            dtype=np.int64
+        ).reshape(len(self.table), len(tokens))
+
+    def add(self, tokens: List[str], counts: np.ndarray) -> np.ndarray:
+        """
+        Adds the counts of the distinct tokens and returns their updated estimates.
+        """
+        columns = self.columns(tokens)
+        np.add.at(self.table, (self.rows, columns), counts)
+        return self.table[self.rows, columns].min(axis=0)
@@ -0,0 +1,19 @@
+"""
+This module provides the HashedWords class which stands for
+the vocabulary in the hashing features mode.
+"""
+
+
+class HashedWords:
+    """
+    Every token is a word, mapped by its murmurhash3
+    to one of n_features feature columns, so no vocabulary
+    has to be built and any shard of verdicts can be
+    featurized on its own.
+    """
+
+    def __init__(self, n_features: int):
+        self.n_features = n_features
+
+    def __len__(self) -> int:
+        return self.n_features
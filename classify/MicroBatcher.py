@@ -0,0 +1,127 @@
+"""
+This module provides the MicroBatcher class which groups the
+documents submitted by concurrent requests into batches
+classified at once.
+"""
+
+from collections import deque
+from concurrent.futures import Future
+from queue import Empty
+from queue import Queue
+from threading import Lock
+from threading import Thread
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+import time
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    A single thread takes the submitted items off the queue and
+    classifies them with classify_batch, in batches of up to
+    max_size items. A batch is classified max_wait seconds after its
+    first item was submitted at the latest, or as soon as it is full.
+    """
+
+    def __init__(self, classify_batch: Callable[[List[Any]], List[Any]], max_size: int, max_wait: float, window: int):
+        self.classify_batch = classify_batch
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.queue = Queue()
+        self.thread = Thread(target=self.run, daemon=True)
+        self.lock = Lock()
+        self.started_at = time.perf_counter()
+        self.latencies = deque(maxlen=window) # Seconds taken by each of the latest requests
+        self.requests = 0
+        self.documents = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def submit(self, items: List[Any]) -> List[Future]:
+        """
+        Queues the items and returns a future of each one's classification.
+        """
+        futures = []
+        for item in items:
+            future = Future()
+            self.queue.put((item, future))
+            futures.append(future)
+        return futures
+
+    def classify(self, items: List[Any]) -> List[Any]:
+        """
+        Submits the items and waits for their classifications.
+        """
+        start = time.perf_counter()
+        results = [future.result() for future in self.submit(items)]
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start)
+            self.requests += 1
+        return results
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_size:
+                try:
+                    entry = self.queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self.run_batch(batch)
+
+    def run_batch(self, batch: List[Any]):
+        start = time.perf_counter()
+        items = [item for item, _ in batch]
+        try:
+            results = self.classify_batch(items)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        with self.lock:
+            self.busy_seconds += time.perf_counter() - start
+            self.documents += len(batch)
+            self.batches += 1
+
+    def metrics(self) -> Dict:
+        """
+        Returns the latency percentiles of the latest requests, in milliseconds,
+        and the throughput of the classified documents.
+        """
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            uptime = time.perf_counter() - self.started_at
+            metrics = {
+                "requests": self.requests,
+                "documents": self.documents,
+                "batches": self.batches,
+                "mean_batch_size": self.documents / self.batches if self.batches else 0,
+                "documents_per_sec": self.documents / uptime if uptime else 0,
+                "busy_documents_per_sec": self.documents / self.busy_seconds if self.busy_seconds else 0,
+            }
+        for percentile in (50, 90, 99):
+            metrics[f"latency_p{percentile}_ms"] = float(np.percentile(latencies, percentile)) if len(latencies) else 0
+        metrics["latency_max_ms"] = float(latencies.max()) if len(latencies) else 0
+        return metrics
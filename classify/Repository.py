@@ -3,27 +3,29 @@ This module provides the Repository class used to group up Verdicts.
 """
 
 from __future__ import annotations
+from typing import Dict
 from typing import List
 from typing import Set
-import os
 
 from classify.Verdict import Verdict
-from constants import TXT_DIR
+from corpus import read_verdict
 
 
 class Repository:
 
-    def __init__(self, fileids: List[str], enum_value: int):
-        self.repository = self.reader(fileids)
+    def __init__(self, fileids: List[str], enum_value: int, verdicts: Dict[str, Verdict] = None):
+        self.repository = self.reader(fileids, {} if verdicts is None else verdicts)
         self.enum_value = enum_value
 
-    def reader(self, fileids: List[str]) -> Set[Verdict]:
+    def reader(self, fileids: List[str], verdicts: Dict[str, Verdict]) -> Set[Verdict]:
+        """
+        Verdicts already in verdicts are not read again, and the read ones are added to it.
+        """
         repo = set()
         for fileid in set(fileids):
-            filepath = os.path.join(TXT_DIR, f"{fileid}.txt")
-            with open(filepath) as f:
-                content = f.read()
-            repo.add(Verdict(content))
+            if fileid not in verdicts:
+                verdicts[fileid] = Verdict(read_verdict(fileid), fileid)
+            repo.add(verdicts[fileid])
         return repo
 
     @property
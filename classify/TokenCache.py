@@ -0,0 +1,80 @@
+"""
+This module provides the TokenCache class which is used to
+store the tokens of each verdict on disk, so each verdict is
+tokenized only once across runs.
+"""
+
+from collections import OrderedDict
+from hashlib import sha1
+from typing import Callable
+from typing import List
+import os
+
+
+class TokenCache:
+
+    def __init__(self, folder: str, max_size: int):
+        self.folder = folder
+        self.max_size = max_size
+        self.memory = OrderedDict()
+
+    def get(self, full_id: str, text: str, tokenize: Callable[[str], List[str]]) -> List[str]:
+        """
+        Returns the tokens of the verdict identified by full_id.
+        Tokens are looked up in memory, then on disk and only
+        computed with tokenize if neither has them for this text.
+        """
+        content_hash = sha1(text.encode()).hexdigest()
+        key = (full_id, content_hash)
+
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        tokens = self.read(full_id, content_hash)
+        if tokens is None:
+            tokens = tokenize(text)
+            self.write(full_id, content_hash, tokens)
+
+        self.remember(key, tokens)
+        return tokens
+
+    def remember(self, key, tokens: List[str]):
+        """
+        Keeps the tokens in memory, evicting the least
+        recently used entries above max_size.
+        """
+        self.memory[key] = tokens
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def read(self, full_id: str, content_hash: str) -> List[str]:
+        """
+        Reads the cached tokens from disk. Returns None if there is
+        no cache file or if it was built from a different text.
+        The first line of the file holds the text hash and each
+        following line holds a token.
+        """
+        filepath = os.path.join(self.folder, f"{full_id}.txt")
+        if not os.path.exists(filepath):
+            return None
+
+        with open(filepath) as f:
+            content = f.read()
+
+        cached_hash, _, tokens = content.partition("\n")
+        if cached_hash != content_hash:
+            return None
+        return tokens.split("\n") if tokens else []
+
+    def write(self, full_id: str, content_hash: str, tokens: List[str]):
+        """
+        Saves the tokens on disk. The file is written aside
+        and then renamed so readers never see a partial file.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        filepath = os.path.join(self.folder, f"{full_id}.txt")
+        tmppath = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmppath, "w") as f:
+            f.write("\n".join([content_hash] + tokens))
+        os.replace(tmppath, filepath)
@@ -1,30 +1,104 @@
 """
 This module provides the Verdict class which is used to wrap
 each verdict text, tokens and features.
+
+Texts are tokenized by the selected tokenizer: nltk word_tokenize,
+or a much faster single regex pass. The regex keeps words, hyphenated
+words, numbers with their inner separators (155-a, 01/02/2012,
+dias-multa) and §, and drops the punctuation.
 """
 
+from typing import Callable
 from typing import Dict
+from typing import FrozenSet
 from typing import List
+import os
+import re
 import string
 
 import nltk
 
+from classify.TokenCache import TokenCache
+from constants import TOKENIZER
+from constants import TOKENS_CACHE_SIZE
+from constants import TOKENS_DIR
+from profiling import profiled
+
 
-STOP = nltk.corpus.stopwords.words("portuguese") + list(string.punctuation) + ['“', '”', '–', '...',]
+STOP = None
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./,]\w+)*|§")
+SELECTED_TOKENIZER = TOKENIZER
+TOKEN_CACHE = TokenCache(os.path.join(TOKENS_DIR, TOKENIZER), TOKENS_CACHE_SIZE)
 
 
 class Verdict:
 
-    def __init__(self, text: str):
+    def __init__(self, text: str, full_id: str = ""):
         self.text = self.preprocess_text(text)
+        self.full_id = full_id
 
     def preprocess_text(self, text: str) -> str:
         return " ".join(w.lower().strip() for w in text.split())
 
+    @staticmethod
+    @profiled("tokenize")
+    def tokenize(text: str) -> List[str]:
+        return TOKENIZERS[SELECTED_TOKENIZER](text)
+
     @property
     def tokens(self) -> List[str]:
-        return [t.lower() for t in nltk.word_tokenize(self.text) if t.lower() not in STOP]
+        """
+        Verdicts with a full_id go through the token cache,
+        so their text is only tokenized once across runs.
+        """
+        if not self.full_id:
+            return self.tokenize(self.text)
+        return TOKEN_CACHE.get(self.full_id, self.text, self.tokenize)
 
     def features(self, word_features: List[str]) -> Dict[str, bool]:
         tokens_set = set(self.tokens)
         return {word: word in tokens_set for word in word_features}
+
+
+def tokenize_with_nltk(text: str) -> List[str]:
+    stop = get_stopwords()
+    return [t for t in map(str.lower, nltk.word_tokenize(text)) if t not in stop]
+
+
+def tokenize_with_regex(text: str) -> List[str]:
+    stop = get_stopwords()
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in stop]
+
+
+TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    "nltk": tokenize_with_nltk,
+    "regex": tokenize_with_regex,
+}
+
+
+def get_tokenizer() -> str:
+    return SELECTED_TOKENIZER
+
+
+def set_tokenizer(name: str):
+    """
+    Selects the tokenizer used by every Verdict. Each tokenizer
+    has its own token cache folder, so their tokens never mix.
+    """
+    global SELECTED_TOKENIZER
+    SELECTED_TOKENIZER = name
+    TOKEN_CACHE.folder = os.path.join(TOKENS_DIR, name)
+    TOKEN_CACHE.memory.clear()
+
+
+def get_stopwords() -> FrozenSet[str]:
+    """
+    Loads the stopwords on first use, so importing
+    this module doesn't read the nltk corpus.
+    """
+    global STOP
+    if STOP is None:
+        STOP = frozenset(
+            nltk.corpus.stopwords.words("portuguese") + list(string.punctuation) + ['“', '”', '–', '...',]
+        )
+    return STOP
@@ -0,0 +1,83 @@
+"""
+This module provides the VocabularyBuilder class which is used
+to select the most common words of the training verdicts,
+counting their tokens one verdict at a time.
+"""
+
+from collections import Counter
+from operator import itemgetter
+from typing import Dict
+from typing import List
+from typing import Tuple
+import heapq
+
+import numpy as np
+
+from classify.CountMinSketch import CountMinSketch
+
+
+class VocabularyBuilder:
+    """
+    Counts exactly, in memory growing with the vocabulary size, and
+    selects the same words, in the same order, as nltk.FreqDist would.
+
+    With a sketch_width, counts are estimated by count-min sketches
+    in fixed memory instead, and only the best 2 x size candidate
+    words are kept between verdicts, so the selection is approximate.
+
+    Words found in fewer than min_df verdicts, or in a share of
+    them above max_df, are never selected.
+    """
+
+    def __init__(self, size: int, min_df: int = 1, max_df: float = 1.0, sketch_width: int = 0, sketch_depth: int = 4):
+        self.size = size
+        self.min_df = min_df
+        self.max_df = max_df
+        self.documents = 0
+        self.track_df = min_df > 1 or max_df < 1
+        self.counts = Counter()
+        self.df = Counter()
+        self.sketch = CountMinSketch(sketch_width, sketch_depth) if sketch_width else None
+        self.df_sketch = CountMinSketch(sketch_width, sketch_depth) if sketch_width and self.track_df else None
+        self.candidates: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, tokens: List[str]):
+        """
+        Counts the tokens of one verdict.
+        """
+        self.documents += 1
+        if self.sketch is not None:
+            self.add_to_sketch(tokens)
+            return
+        self.counts.update(tokens)
+        if self.track_df:
+            self.df.update(set(tokens))
+
+    def add_to_sketch(self, tokens: List[str]):
+        counts = Counter(tokens)
+        if not counts:
+            return
+        words = list(counts)
+        estimates = self.sketch.add(words, np.fromiter(counts.values(), dtype=np.int64, count=len(words)))
+        df_estimates = estimates
+        if self.df_sketch is not None:
+            df_estimates = self.df_sketch.add(words, np.ones(len(words), dtype=np.int64))
+        for word, estimate, df_estimate in zip(words, estimates.tolist(), df_estimates.tolist()):
+            self.candidates[word] = (estimate, df_estimate)
+        if len(self.candidates) > 2 * self.size:
+            best = heapq.nlargest(self.size, self.candidates.items(), key=lambda item: item[1][0])
+            self.candidates = dict(best)
+
+    def words(self) -> List[str]:
+        """
+        Returns up to size words, the most common first.
+        Ties keep the order in which the words were first counted.
+        """
+        max_documents = self.max_df * self.documents
+        if self.sketch is not None:
+            counted = ((word, count, df) for word, (count, df) in self.candidates.items())
+        else:
+            counted = ((word, count, self.df[word]) for word, count in self.counts.items())
+        if self.track_df:
+            counted = (item for item in counted if self.min_df <= item[2] <= max_documents)
+        return [word for word, _, _ in heapq.nlargest(self.size, counted, key=itemgetter(1))]
@@ -1,40 +1,152 @@
 """
 This modules provides the VoteClassifier class which is used
 to combine the classifications provided from different classifiers.
+
+In the cascade mode, the members vote from the cheapest to the
+costliest one, and each document stops being voted on once no
+label can reach the minimum confidence anymore, as its output is
+then (None, None) whatever the other members vote. Documents that
+may still be classified get every vote, since their confidence
+is the exact share of votes of their label. So the saving is small:
+with five members and a 0.75 CONFIDENCE, only documents whose four
+cheapest members split 2-2 or 2-1-1 skip the costliest one, and the
+random forest is not skipped in general.
 """
 
-from statistics import mode
-from typing import Dict
 from typing import List
 from typing import Tuple
 from typing import Union
+import time
+
+from scipy.sparse import csr_matrix
+from sklearn.base import ClassifierMixin
+import numpy as np
 
-from nltk.classify import ClassifierI
-from nltk.classify.scikitlearn import SklearnClassifier
+from profiling import profiled
 
 
-class VoteClassifier(ClassifierI):
-    def __init__(self, classifiers: List[SklearnClassifier]):
+class VoteClassifier:
+    def __init__(self, classifiers: List[ClassifierMixin]):
         self._classifiers = classifiers
+        self._costs = [0.0] * len(classifiers) # Seconds each member takes to classify a document
+        self.cascade = False
+        self.evaluations = 0 # Documents classified by members
+        self.skipped = 0 # Documents the cascade didn't need members to classify
+
+    @property
+    def classifiers(self) -> List[ClassifierMixin]:
+        return self._classifiers
+
+    def measure_costs(self, features: csr_matrix):
+        """
+        Times each member classifying the features rows, setting the order the cascade votes in.
+        """
+        rows = features.shape[0]
+        if not rows:
+            return
+        for i, classifier in enumerate(self._classifiers):
+            start = time.perf_counter()
+            classifier.predict(features)
+            self._costs[i] = (time.perf_counter() - start) / rows
+
+    def pop_counts(self) -> Tuple[int, int]:
+        """
+        Returns the evaluations and skipped counts and resets them.
+        """
+        counts = self.evaluations, self.skipped
+        self.evaluations, self.skipped = 0, 0
+        return counts
+
+    @profiled("votes")
+    def votes(self, features: csr_matrix) -> np.ndarray:
+        """
+        Returns a classifiers x documents array with the
+        prediction of each classifier for each features row.
+        """
+        return np.array([c.predict(features) for c in self._classifiers])
 
-    def votes(self, features):
-        return [c.classify(features) for c in self._classifiers]
+    def count_votes(self, votes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the most voted label of each document and how many
+        votes it got. Ties go to the label voted first, as statistics.mode does.
+        """
+        voters = votes.shape[0]
+        labels = np.unique(votes)
+        matches = votes[np.newaxis, :, :] == labels[:, np.newaxis, np.newaxis]
+        counts = matches.sum(axis=1)
+        first_vote = np.where(matches.any(axis=1), matches.argmax(axis=1), voters)
+        winners = (counts * (voters + 1) - first_vote).argmax(axis=0)
+        documents = np.arange(votes.shape[1])
+        return labels[winners], counts[winners, documents]
+
+    @profiled("votes")
+    def cascade_votes(self, features: csr_matrix, min_confidence: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the rows that got every vote and their classifiers x
+        rows votes array, voting from the cheapest classifier and
+        leaving out the rows no label can get min_confidence for.
+        """
+        voters = len(self._classifiers)
+        needed = next((c for c in range(voters + 1) if c / voters >= min_confidence), voters + 1)
+        order = sorted(range(voters), key=lambda i: self._costs[i])
+        rows = np.arange(features.shape[0])
+        votes = None
+        for done, i in enumerate(order, 1):
+            predicted = self._classifiers[i].predict(features[rows])
+            if votes is None:
+                votes = np.empty((voters, features.shape[0]), dtype=predicted.dtype)
+            votes[i, rows] = predicted
+            self.evaluations += len(rows)
+
+            remaining = voters - done
+            _, counts = self.count_votes(votes[order[:done]][:, rows])
+            open_rows = rows[counts + remaining >= needed]
+            self.skipped += (len(rows) - len(open_rows)) * remaining
+            rows = open_rows
+            if not len(rows):
+                break
+        return rows, votes[:, rows]
+
+    def safe_classify_many(
+        self,
+        features: csr_matrix,
+        min_confidence: float
+    ) -> List[Union[Tuple[int, float], Tuple[None, None]]]:
+        """
+        Classifies each row of the features matrix with min_confidence.
+        """
+        voters = len(self._classifiers)
+        output = [(None, None)] * features.shape[0]
+        if self.cascade and features.shape[0]:
+            rows, votes = self.cascade_votes(features, min_confidence)
+        else:
+            rows, votes = range(features.shape[0]), self.votes(features)
+            self.evaluations += voters * features.shape[0]
+        if not len(rows):
+            return output
+        most_voted, counts = self.count_votes(votes)
+        for row, label, count in zip(rows, most_voted.tolist(), counts.tolist()):
+            confidence = count / voters
+            if confidence >= min_confidence:
+                output[row] = (label, confidence)
+        return output
 
     def safe_classify(
         self,
-        features: Dict[str, bool],
+        features: csr_matrix,
         min_confidence: float
     ) -> Union[Tuple[int, float], Tuple[None, None]]:
         """
-        Classifies the features with min_confidence.
+        Classifies the single row features matrix with min_confidence.
         """
-        votes = self.votes(features)
-        most_voted = mode(votes)
-        confidence = votes.count(most_voted) / len(votes)
-        return (most_voted, confidence) if confidence >= min_confidence else (None, None)
+        return self.safe_classify_many(features, min_confidence)[0]
 
-    def classify(self, features: Dict[str, bool]) -> List[int]:
+    def classify_many(self, features: csr_matrix) -> List[int]:
         """
         This method is only used in training to check accuracy.
         """
-        return mode(self.votes(features))
+        most_voted, _ = self.count_votes(self.votes(features))
+        return most_voted.tolist()
+
+    def classify(self, features: csr_matrix) -> int:
+        return self.classify_many(features)[0]
@@ -1,24 +1,45 @@
 """
-This module initializes the classifiers wrapped in the
-nltk api for sklearn classifiers and provides the CLASSIFIERS list
+This module initializes the sklearn classifiers
+ensembled by the VoteClassifier.
 """
 
-from nltk.classify.scikitlearn import SklearnClassifier
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import SGDClassifier
 from sklearn.linear_model import RidgeClassifier
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.svm import LinearSVC
+import numpy as np
 
 
-def get_classifiers():
-    mnb = SklearnClassifier(MultinomialNB())
-    sgd = SklearnClassifier(SGDClassifier())
-    lsvc = SklearnClassifier(LinearSVC(dual=False))
-    rf = SklearnClassifier(RandomForestClassifier())
-    ridge = SklearnClassifier(RidgeClassifier())
+# Members updated with only the new labels, and members
+# refit on all the training features, on incremental updates.
+# The others are only trained by full retrains.
+# MultinomialNB partial_fit adds up counts, ending as if refit, while
+# a single SGDClassifier partial_fit step on a few rows hurts it.
+PARTIAL_FIT = (MultinomialNB,)
+REFIT = (SGDClassifier, LinearSVC, RidgeClassifier)
+
+
+def get_classifiers(n_jobs: int = 1):
+    """
+    n_jobs is passed to the classifiers supporting it.
+    """
+    mnb = MultinomialNB()
+    sgd = SGDClassifier(n_jobs=n_jobs)
+    lsvc = LinearSVC(dual=False)
+    rf = RandomForestClassifier(n_jobs=n_jobs)
+    ridge = RidgeClassifier()
     return [mnb, sgd, lsvc, rf, ridge]
 
 
+def get_accuracy(predicted, expected: np.ndarray) -> float:
+    """
+    Returns the share of predicted labels equal to the expected ones.
+    """
+    if len(expected) == 0:
+        return 0.0
+    return float(np.mean(np.asarray(predicted) == expected))
+
+
 if __name__ == "__main__":
     pass
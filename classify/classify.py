@@ -1,37 +1,87 @@
 """
 Module to classify the textual content of the verdicts
-using nltk and sklearn.
+using sklearn.
 """
 
 from math import floor
+from multiprocessing import Pool
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Set
 from typing import Tuple
 import os
 import random
+import time
 
-import nltk
+from joblib import Parallel
+from joblib import delayed
+from scipy.sparse import csr_matrix
+from sklearn.base import ClassifierMixin
+import numpy as np
 import pandas as pd
 
+from classify.classifiers import get_accuracy
 from classify.classifiers import get_classifiers
+from catalogue import catalogue_exists
+from catalogue import get_unclassified_ids
+from catalogue import track_classifications
 from classify import human
 from classify.Enums import CrimeTypeEnum
 from classify.Enums import ResultTypeEnum
+from classify.incremental import update_models
+from classify.models import Models
+from classify.models import get_fingerprint
+from classify.models import load_models
+from classify.models import save_models
 from classify.Repository import Repository
+from classify.features import get_feature_matrix
+from classify.features import Words
+from classify.features import get_feature_mode
+from classify.features import get_task_features
+from classify.features import get_union_words
+from classify.features import slice_words
+from classify.HashedWords import HashedWords
 from classify.Verdict import Verdict
+from classify.Verdict import get_tokenizer
+from classify.Verdict import set_tokenizer
+from classify.VocabularyBuilder import VocabularyBuilder
 from classify.VoteClassifier import VoteClassifier
+from constants import BATCH_SIZE
 from constants import CONFIDENCE
 from constants import DEFAULT_SAMPLE
 from constants import FEATS_LEN
 from constants import FULL_TRAIN_DATA_PATH
+from constants import HASH_FEATURES
+from constants import MEMBER_JOBS
+from constants import MODEL_PATH
 from constants import OUT_CSV_NAMES
 from constants import OUT_DIR
+from constants import TRAIN_JOBS
 from constants import TRAIN_CSV_NAMES
 from constants import TRAIN_DIR
-from constants import TXT_DIR
-from csv_utils import append_to_full_training_csv
+from constants import VOCAB_MAX_DF
+from constants import VOCAB_MIN_DF
+from constants import VOCAB_SKETCH_DEPTH
+from constants import VOCAB_SKETCH_WIDTH
+from corpus import list_verdict_ids
+from corpus import read_verdict
 from csv_utils import get_dataframe
-from csv_utils import save_list_as_csv
+from csv_utils import get_latest_csv_path
+from csv_utils import get_unique_csv_path
+from csv_utils import recover_csv_ids
+from csv_utils import stream_lines_to_csv
+from labels import VERIFIED
+from labels import add_labels
+from labels import read_training_labels
+from profiling import profiled
+from profiling import stage
+
+
+WORKER_MODELS = None # Trained models of a worker process, set by init_worker
+
+TrainingSet = Tuple[csr_matrix, np.ndarray]
 
 
 def classify(
@@ -39,26 +89,48 @@ def classify(
     training_file: str = "",
     sample_size: int = 0,
     random_state: int = 1,
-    train_size: float = 0.75
+    train_size: float = 0.75,
+    batch_size: int = BATCH_SIZE,
+    workers: int = 1,
+    resume: bool = False,
+    model_path: str = "",
+    unclassified: bool = False,
+    train_jobs: int = TRAIN_JOBS,
+    member_jobs: int = MEMBER_JOBS,
+    cascade: bool = False
 ):
     """
     Loads the training data, train the classifiers and classify
     either the whole available corpus or a sample.
+    With a model_path, the saved models are used instead, being
+    retrained only if the training data changed since they were saved.
+    Output lines are streamed to the output .csv file. When resuming,
+    the latest output file is appended to and the documents already
+    in it are skipped.
+    If there is a catalogue, each classification is recorded in it and
+    unclassified restricts the corpus to the verdicts never classified.
+    With cascade, the vote classifiers vote in the cascade mode and
+    how many member evaluations it skipped is printed.
     """
-    crime_data, result_data = load_training_data(training_file)
-
-    print("\nTraining crime type classifier.")
-    crime_words, crime_classifier = get_words_and_trained_classifier(crime_data, train_size)
+    if model_path:
+        models = get_models(training_file, train_size, model_path, train_jobs, member_jobs)
+    else:
+        models, _ = train_models(training_file, train_size, train_jobs, member_jobs)
+    crime_words, crime_classifier, result_words, result_classifier = models
+    crime_classifier.cascade = result_classifier.cascade = cascade
 
-    print("\nTraining result type classifier.")
-    result_words, result_classifier = get_words_and_trained_classifier(result_data, train_size)
+    output_path, classified = get_output_path(resume)
 
     if command == "corpus":
         output = classify_corpus(
             crime_words,
             crime_classifier,
             result_words,
-            result_classifier
+            result_classifier,
+            batch_size,
+            workers,
+            classified,
+            unclassified
         )
 
     if command == "sample":
@@ -68,194 +140,485 @@ def classify(
             result_words,
             result_classifier,
             sample_size,
-            random_state
+            random_state,
+            batch_size,
+            workers,
+            classified
         )
 
-    output_path = save_list_as_csv(OUT_DIR, "output", output)
+    if catalogue_exists():
+        output = track_classifications(output)
+
+    stream_lines_to_csv(output_path, output)
+    if cascade:
+        for name, classifier in (("crime", crime_classifier), ("result", result_classifier)):
+            evaluations, skipped = classifier.pop_counts()
+            print(f"\nCascade {name} voting skipped {skipped} of {evaluations + skipped} member evaluations")
     verify_output_sample(output_path)
 
 
+def train(
+    training_file: str = "",
+    train_size: float = 0.75,
+    model_path: str = MODEL_PATH,
+    train_jobs: int = TRAIN_JOBS,
+    member_jobs: int = MEMBER_JOBS
+):
+    """
+    Trains the classifiers and saves them at model_path.
+    """
+    fingerprint = get_fingerprint(get_training_path(training_file))
+    models, training = train_models(training_file, train_size, train_jobs, member_jobs)
+    save_models(model_path, fingerprint, models, training)
+    print(f"\nModels saved at {model_path}")
+
+
+def get_models(
+    training_file: str,
+    train_size: float,
+    model_path: str,
+    train_jobs: int = TRAIN_JOBS,
+    member_jobs: int = MEMBER_JOBS
+) -> Models:
+    """
+    Loads the models saved at model_path if they were trained
+    on the current training data. If labels were added to it since,
+    the models are updated with them, when possible, or trained
+    and saved again otherwise.
+    """
+    training_path = get_training_path(training_file)
+    fingerprint = get_fingerprint(training_path)
+    models = load_models(model_path, fingerprint)
+    if models is not None:
+        print(f"Loaded models from {model_path}")
+        return models
+
+    models = update_models(model_path, training_path, fingerprint)
+    if models is not None:
+        return models
+
+    print(f"Models at {model_path} are missing or outdated. Retraining.")
+    models, training = train_models(training_file, train_size, train_jobs, member_jobs)
+    save_models(model_path, fingerprint, models, training)
+    return models
+
+
+def train_models(
+    training_file: str,
+    train_size: float,
+    train_jobs: int = TRAIN_JOBS,
+    member_jobs: int = MEMBER_JOBS
+) -> Tuple[Models, Dict]:
+    """
+    Loads the training data and trains the crime and result type
+    classifiers, all of their members at once on train_jobs threads.
+    Returns the models and the training state they can be updated from.
+    """
+    crime_data, result_data = load_training_data(training_file)
+    models, (crime_sets, result_sets) = train_repositories(crime_data, result_data, train_size, train_jobs, member_jobs)
+    training = {
+        "labels": read_training_labels(get_training_path(training_file)),
+        "crime": crime_sets,
+        "result": result_sets,
+        "updates": 0,
+    }
+    return models, training
+
+
+def train_repositories(
+    crime_data: List[Repository],
+    result_data: List[Repository],
+    train_size: float,
+    train_jobs: int = TRAIN_JOBS,
+    member_jobs: int = MEMBER_JOBS
+) -> Tuple[Models, List[Tuple[TrainingSet, TrainingSet]]]:
+    """
+    Trains the crime and result type classifiers on the loaded training data.
+    Returns the models and the training and testing sets of each type.
+    """
+    crime_sets, result_sets = get_tasks_train_test_sets([crime_data, result_data], train_size)
+    crime_words, crime_train, crime_test = crime_sets
+    result_words, result_train, result_test = result_sets
+
+    crime_classifier, result_classifier = train_classifiers(
+        [("crime type", crime_train, crime_test), ("result type", result_train, result_test)],
+        train_jobs,
+        member_jobs
+    )
+    models = (crime_words, crime_classifier, result_words, result_classifier)
+    return models, [(crime_train, crime_test), (result_train, result_test)]
+
+
+def get_output_path(resume: bool) -> Tuple[str, Set[str]]:
+    """
+    Returns the output .csv path and the ids already classified in it.
+    A new file is used unless resuming an existing one.
+    """
+    output_path = get_latest_csv_path(OUT_DIR, "output") if resume else ""
+    if output_path == "":
+        return get_unique_csv_path(OUT_DIR, "output"), set()
+    classified = recover_csv_ids(output_path)
+    print(f"Resuming {output_path}, skipping {len(classified)} classified documents")
+    return output_path, classified
+
+
+@profiled("load_training_data")
 def load_training_data(filename: str) -> Tuple[List[Repository], List[Repository]]:
     """
     Reads the training data .csv file and returns a tuple with 3
     verdicts repositories, one for each kind.
+    Each verdict is read once, its Verdict shared by the repositories of both types.
     """
-    tp = FULL_TRAIN_DATA_PATH if filename == "" else os.path.join(TRAIN_DIR, filename)
+    tp = get_training_path(filename)
     print(f"Loading training data from {tp}")
     train = pd.read_csv(tp, names=TRAIN_CSV_NAMES, sep=";")
-    crime = [load_training_type(train, "crime_type", m.value) for m in CrimeTypeEnum]
-    result = [load_training_type(train, "result_type", m.value) for m in ResultTypeEnum]
+    verdicts = {}
+    crime = [load_training_type(train, "crime_type", m.value, verdicts) for m in CrimeTypeEnum]
+    result = [load_training_type(train, "result_type", m.value, verdicts) for m in ResultTypeEnum]
     return crime, result
 
 
-def load_training_type(df: pd.DataFrame, type_field: str, type_value: int) -> Repository:
+def get_training_path(filename: str) -> str:
     """
-    Loads a specific training data type into a Repository.
+    Returns the path of the training data file, defaulting to the full training data.
+    """
+    return FULL_TRAIN_DATA_PATH if filename == "" else os.path.join(TRAIN_DIR, filename)
+
+
+def load_training_type(
+    df: pd.DataFrame,
+    type_field: str,
+    type_value: int,
+    verdicts: Dict[str, Verdict] = None
+) -> Repository:
+    """
+    Loads a specific training data type into a Repository,
+    sharing the verdicts already read into verdicts.
     """
     fileids = list(df[df[type_field] == type_value]["full_id"])
-    repo = Repository(fileids=fileids, enum_value=type_value)
+    repo = Repository(fileids=fileids, enum_value=type_value, verdicts=verdicts)
     return repo
 
 
-def get_words_and_trained_classifier(
-    training_data: List[Repository],
-    train_size:float
-) -> Tuple[List[str], VoteClassifier]:
+def get_tasks_train_test_sets(
+    tasks_data: List[List[Repository]],
+    train_size: float
+) -> List[Tuple[Words, TrainingSet, TrainingSet]]:
+    """
+    Gets the top FEATS_LEN words of the training_data of each task,
+    or the hashed words in the hashing mode, and its features split
+    into training and testing sets. Each verdict is tokenized once:
+    its tokens are counted into the vocabularies of every task, and
+    read back from the token cache into one features matrix over the
+    union of their words. Each task gets its rows and columns of it.
+    """
+    verdicts = list({v.full_id: v for data in tasks_data for repo in data for v in repo.repository}.values())
+    if get_feature_mode() == "hashing":
+        task_words = [HashedWords(HASH_FEATURES)] * len(tasks_data)
+    else:
+        task_words = get_tasks_vocabularies(verdicts, tasks_data)
+    union = get_union_words(task_words)
+    with stage("get_all_features"):
+        matrix = get_feature_matrix(verdicts, union)
+
+    rows = {verdict.full_id: row for row, verdict in enumerate(verdicts)}
+    sets = []
+    for training_data, words in zip(tasks_data, task_words):
+        task_rows = [rows[v.full_id] for repo in training_data for v in repo.repository]
+        labels = np.array([repo.enum_value for repo in training_data for _ in repo.repository])
+        features = slice_words(matrix[task_rows], union, words)
+        train, test = get_train_test_sets(features, labels, train_size)
+        sets.append((words, train, test))
+    return sets
+
+
+@profiled("vocabulary")
+def get_tasks_vocabularies(verdicts: List[Verdict], tasks_data: List[List[Repository]]) -> List[List[str]]:
     """
-    Gets a list with the top FEATS_LEN words
-    of each type (crime or result) and a trained
-    vote classifier trained on the training_data.
+    Counts the tokens of each verdict, read once, into the vocabularies
+    of the tasks it is training data of. Returns the words of each task.
     """
-    tokens = []
-    for repo in training_data:
-        tokens.extend(repo.tokens)
-    fdist = nltk.FreqDist(tokens)
-    words = list(fdist)[:FEATS_LEN]
-    features = get_all_features(training_data, words)
-    train, test = get_train_test_sets(features, train_size)
-    vote_classifier = train_classifiers(train, test)
-    return words, vote_classifier
+    builders = [
+        VocabularyBuilder(FEATS_LEN, VOCAB_MIN_DF, VOCAB_MAX_DF, VOCAB_SKETCH_WIDTH, VOCAB_SKETCH_DEPTH)
+        for _ in tasks_data
+    ]
+    members = [{v.full_id for repo in data for v in repo.repository} for data in tasks_data]
+    for verdict in verdicts:
+        tokens = verdict.tokens
+        for builder, full_ids in zip(builders, members):
+            if verdict.full_id in full_ids:
+                builder.add(tokens)
+    return [builder.words() for builder in builders]
 
 
 def get_train_test_sets(
-    features: List[Tuple[Dict[str, bool], int]],
+    features: csr_matrix,
+    labels: np.ndarray,
     train_size: float,
-) -> Tuple[List[Tuple[Dict[str, bool], int]], List[Tuple[Dict[str, bool], int]]]:
+) -> Tuple[TrainingSet, TrainingSet]:
     """
     Shuffles the data, split it into two and returns
-    two Lists, one for traning and one for testing.
+    two (features, labels) tuples, one for traning and one for testing.
     """
-    random.shuffle(features)
-    features_size = len(features)
-    boundary = floor(train_size * features_size)
-    train, test = features[:boundary], features[boundary:]
-    return train, test
+    rows = list(range(features.shape[0]))
+    random.shuffle(rows)
+    boundary = floor(train_size * len(rows))
+    train, test = rows[:boundary], rows[boundary:]
+    return (features[train], labels[train]), (features[test], labels[test])
 
 
 def train_classifiers(
-    train: List[Tuple[Dict[str, bool], int]],
-    test: List[Tuple[Dict[str, bool], int]]
-) -> VoteClassifier:
+    tasks: List[Tuple[str, TrainingSet, TrainingSet]],
+    train_jobs: int = TRAIN_JOBS,
+    member_jobs: int = MEMBER_JOBS
+) -> List[VoteClassifier]:
+    """
+    Trains the classifiers of each (name, train, test) task, all
+    of them at once on train_jobs threads, sharing each task
+    features matrix, and then ensembles one VoteClassifier per task.
+    Prints the accuracy and training time of each classifier.
+    """
+    members = [(task, get_classifiers(member_jobs)) for task in tasks]
+    start = time.perf_counter()
+    fits = Parallel(n_jobs=train_jobs, prefer="threads")(
+        delayed(fit_classifier)(classifier, train, test)
+        for (_, train, test), classifiers in members
+        for classifier in classifiers
+    )
+    elapsed = time.perf_counter() - start
+
+    vote_classifiers = []
+    fits = iter(fits)
+    for (name, _, (test_features, test_labels)), classifiers in members:
+        print(f"\nTrained {name} classifier.")
+        for classifier, (accuracy, seconds) in zip(classifiers, fits):
+            print(classifier, accuracy, f"({seconds:.2f}s)")
+        vote_classifier = VoteClassifier(classifiers)
+        vote_classifier.measure_costs(test_features)
+        print("voted: ", get_accuracy(vote_classifier.classify_many(test_features), test_labels))
+        vote_classifiers.append(vote_classifier)
+    print(f"Trained {sum(len(c) for _, c in members)} classifiers in {elapsed:.2f}s")
+    return vote_classifiers
+
+
+def fit_classifier(classifier: ClassifierMixin, train: TrainingSet, test: TrainingSet) -> Tuple[float, float]:
+    """
+    Fits the classifier on the training set and returns its
+    accuracy on the testing set and its training time.
+    """
+    train_features, train_labels = train
+    test_features, test_labels = test
+    start = time.perf_counter()
+    with stage(f"train.{type(classifier).__name__}"):
+        classifier.fit(train_features, train_labels)
+    seconds = time.perf_counter() - start
+    return get_accuracy(classifier.predict(test_features), test_labels), seconds
+
+
+def classify_sample(
+    crime_words: Words,
+    crime_classifier: VoteClassifier,
+    result_words: Words,
+    result_classifier: VoteClassifier,
+    size: int,
+    state: int,
+    batch_size: int = BATCH_SIZE,
+    workers: int = 1,
+    skip: Set[str] = frozenset()
+) -> Iterator[str]:
     """
-    Trains each classifier individually and
-    then ensembles the VoteClassifier.
+    Classifies a sample of the available corpus,
+    except the documents whose ids are in skip.
     """
-    classifiers = get_classifiers()
-    for classifier in classifiers:
-        classifier.train(train)
-        print(classifier, nltk.classify.accuracy(classifier, test))
-    vote_classifier = VoteClassifier(classifiers)
-    print("voted: ", nltk.classify.accuracy(vote_classifier, test))
-    return vote_classifier
+    df = get_dataframe()
+    df = df.sample(n=size, random_state=state)
+    return classify_fileids(
+        [fileid for fileid in df["full_id"] if fileid not in skip],
+        crime_words,
+        crime_classifier,
+        result_words,
+        result_classifier,
+        batch_size,
+        workers
+    )
 
 
-def get_all_features(
-    training_data: List[Repository],
-    word_features: List[str]
-) -> List[Tuple[Dict[str, bool], int]]:
+def classify_corpus(
+    crime_words: Words,
+    crime_classifier: VoteClassifier,
+    result_words: Words,
+    result_classifier: VoteClassifier,
+    batch_size: int = BATCH_SIZE,
+    workers: int = 1,
+    skip: Set[str] = frozenset(),
+    unclassified: bool = False
+) -> Iterator[str]:
     """
-    Gets the features from each Repository and
-    add them all into one list.
+    Classifies all of the available corpus, or only its never
+    classified verdicts, except the documents whose ids are in skip.
     """
-    features = []
-    for repo in training_data:
-        features.extend(get_corpus_features_list(repo, word_features))
-    return features
+    fileids = get_unclassified_ids() if unclassified else list_verdict_ids()
+    return classify_fileids(
+        [fileid for fileid in fileids if fileid not in skip],
+        crime_words,
+        crime_classifier,
+        result_words,
+        result_classifier,
+        batch_size,
+        workers
+    )
+
+
+def classify_fileids(
+    fileids: List[str],
+    crime_words: Words,
+    crime_classifier: VoteClassifier,
+    result_words: Words,
+    result_classifier: VoteClassifier,
+    batch_size: int,
+    workers: int = 1
+) -> Iterator[str]:
+    """
+    Classifies the documents in batches of batch_size and
+    yields one output line for each of them, in the fileids order.
+    With more than one worker the batches are spread over a process pool.
+    """
+    batches = [fileids[start:start + batch_size] for start in range(0, len(fileids), batch_size)]
+    models = (crime_words, crime_classifier, result_words, result_classifier)
+
+    if workers > 1:
+        with Pool(workers, initializer=init_worker, initargs=(*models, get_tokenizer())) as pool:
+            yield from iter_batches(
+                add_worker_counts(lines, counts, crime_classifier, result_classifier)
+                for lines, counts in pool.imap(classify_worker_batch, batches)
+            )
+        return
 
+    yield from iter_batches(classify_batch(batch, *models) for batch in batches)
 
-def get_corpus_features_list(
-    repo: Repository,
-    word_features: List[str]
-) -> List[Tuple[Dict[str, bool], int]]:
+
+def iter_batches(classified: Iterable[List[str]]) -> Iterator[str]:
     """
-    Gets the features list from a Repository.
+    Yields the output lines of each classified batch, printing the progress.
     """
-    return [(v.features(word_features), repo.enum_value) for v in repo.repository]
+    done = 0
+    for lines in classified:
+        yield from lines
+        done += len(lines)
+        print(f"Classifying document #{done - 1}", end="\r")
 
 
-def classify_sample(
-    crime_words: List[str],
+def init_worker(
+    crime_words: Words,
     crime_classifier: VoteClassifier,
-    result_words: List[str],
+    result_words: Words,
     result_classifier: VoteClassifier,
-    size: int,
-    state: int
+    tokenizer: str
+):
+    """
+    Stores the trained models in a worker process
+    so they are shared once and not sent with every batch,
+    and selects the tokenizer they were trained with, as
+    spawned workers don't inherit the selected one.
+    """
+    global WORKER_MODELS
+    if tokenizer != get_tokenizer():
+        set_tokenizer(tokenizer)
+    WORKER_MODELS = (crime_words, crime_classifier, result_words, result_classifier)
+
+
+def classify_worker_batch(fileids: List[str]) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Classifies a batch inside a worker process with the models set by init_worker.
+    Returns the output lines and the evaluations and skipped counts of both vote classifiers.
+    """
+    lines = classify_batch(fileids, *WORKER_MODELS)
+    return lines, [WORKER_MODELS[1].pop_counts(), WORKER_MODELS[3].pop_counts()]
+
+
+def add_worker_counts(
+    lines: List[str],
+    counts: List[Tuple[int, int]],
+    crime_classifier: VoteClassifier,
+    result_classifier: VoteClassifier
 ) -> List[str]:
     """
-    Classifies a sample of the available corpus.
+    Adds the counts of a worker batch to the vote classifiers and returns its lines.
     """
-    df = get_dataframe()
-    df = df.sample(n=size, random_state=state)
-    output = []
-    for i, fileid in enumerate(list(df["full_id"])):
-        print(f"Classifying document #{i}", end="\r")
-        filepath = os.path.join(TXT_DIR, f"{fileid}.txt")
-        crime, result = classify_document(
-            filepath,
-            crime_words,
-            crime_classifier,
-            result_words,
-            result_classifier
-        )
-        output.append(f"{fileid};{';'.join(crime)};{';'.join(result)}")
-    return output
+    for classifier, (evaluations, skipped) in zip((crime_classifier, result_classifier), counts):
+        classifier.evaluations += evaluations
+        classifier.skipped += skipped
+    return lines
 
 
-def classify_corpus(
-    crime_words: List[str],
+def classify_batch(
+    fileids: List[str],
+    crime_words: Words,
     crime_classifier: VoteClassifier,
-    result_words: List[str],
+    result_words: Words,
     result_classifier: VoteClassifier
 ) -> List[str]:
     """
-    Classifies all of the available corpus.
+    Classifies a batch of documents and returns their output lines.
     """
-    output = []
-    corpus = os.listdir(TXT_DIR)
-    for i, _file in enumerate(corpus):
-        print(f"Classifying document #{i}", end="\r")
-        fileid = _file.replace(".txt", "")
-        sent_path = os.path.join(TXT_DIR, _file)
-        crime, result = classify_document(
-            sent_path,
-            crime_words,
-            crime_classifier,
-            result_words,
-            result_classifier
-        )
-        output.append(f"{fileid};{';'.join(crime)};{';'.join(result)}")
-    return output
+    classified = classify_documents(
+        fileids,
+        crime_words,
+        crime_classifier,
+        result_words,
+        result_classifier
+    )
+    return [f"{fileid};{';'.join(crime)};{';'.join(result)}" for fileid, (crime, result) in zip(fileids, classified)]
+
+
+@profiled("classify_documents")
+def classify_documents(
+    fileids: List[str],
+    crime_words: Words,
+    crime_classifier: VoteClassifier,
+    result_words: Words,
+    result_classifier: VoteClassifier,
+) -> List[Tuple[Tuple[str, str], Tuple[str, str]]]:
+    """
+    Reads the text content of a batch of documents and classifies them.
+    """
+    with stage("read_verdicts"):
+        verdicts = [Verdict(read_verdict(fileid), fileid) for fileid in fileids]
+    crime_features, result_features = get_task_features(verdicts, [crime_words, result_words])
+    crime = classify_types(crime_features, crime_classifier)
+    result = classify_types(result_features, result_classifier)
+    return list(zip(crime, result))
 
 
+@profiled("classify_document")
 def classify_document(
-    filepath: str,
-    crime_words: List[str],
+    fileid: str,
+    crime_words: Words,
     crime_classifier: VoteClassifier,
-    result_words: List[str],
+    result_words: Words,
     result_classifier: VoteClassifier,
 ) -> Tuple[Tuple[str, str], Tuple[str, str]]:
     """
     Reads the text content of a document and classifies it.
     """
-    with open(filepath) as f:
-        content = f.read()
-    v = Verdict(content)
-    crime = classify_type(v, crime_words, crime_classifier)
-    result = classify_type(v, result_words, result_classifier)
-    return crime, result
+    return classify_documents(
+        [fileid],
+        crime_words,
+        crime_classifier,
+        result_words,
+        result_classifier
+    )[0]
 
 
-def classify_type(
-    verdict: Verdict,
-    words: List[str],
+def classify_types(
+    features: csr_matrix,
     classifier: VoteClassifier
-) -> Tuple[str, str]:
+) -> List[Tuple[str, str]]:
     """
-    Classifies the verdict and returns the classification and confidence.
+    Classifies the verdicts features rows and returns each classification and confidence.
     """
-    features = verdict.features(words)
-    _type, _confidence = classifier.safe_classify(features, CONFIDENCE)
-    return str(_type), str(_confidence)
+    classified = classifier.safe_classify_many(features, CONFIDENCE)
+    return [(str(_type), str(_confidence)) for _type, _confidence in classified]
 
 
 def verify_output_sample(filepath: str):
@@ -273,7 +636,7 @@ def verify_output_sample(filepath: str):
     df: pd.DataFrame = df.sample(n=DEFAULT_SAMPLE)
     print(df.to_string())
     outpath = human.classify_files(df)
-    append_to_full_training_csv(outpath)
+    add_labels(outpath, VERIFIED)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+"""
+This module compares the hashing feature mode to the vocabulary
+one on the training data: how long each takes to featurize the
+verdicts and train the classifiers, how large its feature matrices
+are and how accurate the trained classifiers are.
+
+Both modes featurize and train as train_models does, on the same
+split of the same verdicts, whose tokens are read beforehand so
+neither pays for tokenizing.
+"""
+
+from typing import Dict
+from typing import List
+import random
+import time
+
+from classify.classifiers import get_accuracy
+from classify.classify import get_tasks_train_test_sets
+from classify.classify import load_training_data
+from classify.classify import train_classifiers
+from classify.features import get_feature_mode
+from classify.features import set_feature_mode
+from classify.Repository import Repository
+from constants import FEATURE_MODES
+
+
+TASKS = ["crime", "result"]
+
+
+def evaluate_feature_mode(mode: str, tasks_data: List[List[Repository]], train_size: float, seed: int) -> Dict:
+    """
+    Featurizes the training data of both types in the feature mode, trains
+    the classifiers on it and returns the timings and accuracy of each type.
+    """
+    set_feature_mode(mode)
+    random.seed(seed)
+    start = time.perf_counter()
+    task_sets = get_tasks_train_test_sets(tasks_data, train_size)
+    featurized = time.perf_counter()
+    vote_classifiers = train_classifiers([(f"{name} {mode}", train, test) for name, (_, train, test) in zip(TASKS, task_sets)])
+    trained = time.perf_counter()
+
+    report = {}
+    for name, (words, train, test), vote_classifier in zip(TASKS, task_sets, vote_classifiers):
+        (train_features, _), (test_features, test_labels) = train, test
+        report[name] = {
+            "features": len(words),
+            "matrix_kb": sum(m.data.nbytes + m.indices.nbytes + m.indptr.nbytes for m in (train_features, test_features)) / 1024,
+            "featurize_seconds": featurized - start,
+            "train_seconds": trained - featurized,
+            "accuracy": get_accuracy(vote_classifier.classify_many(test_features), test_labels),
+            "members": {
+                type(classifier).__name__: get_accuracy(classifier.predict(test_features), test_labels)
+                for classifier in vote_classifier.classifiers
+            },
+        }
+    return report
+
+
+def check_feature_modes(filename: str = "", train_size: float = 0.75, seed: int = 0) -> Dict:
+    """
+    Compares the feature modes on the crime and result training data.
+    Returns the report of each type and mode. Featurizing and
+    training times are those of both types together.
+    """
+    selected = get_feature_mode()
+    tasks_data = list(load_training_data(filename))
+    for data in tasks_data:
+        for repo in data:
+            for verdict in repo.repository:
+                verdict.tokens
+
+    report = {name: {} for name in TASKS}
+    try:
+        for mode in FEATURE_MODES:
+            for name, stats in evaluate_feature_mode(mode, tasks_data, train_size, seed).items():
+                report[name][mode] = stats
+    finally:
+        set_feature_mode(selected)
+
+    print("\ntype mode: features, matrix kB, featurize s, train s, accuracy")
+    for name, modes in report.items():
+        for mode, stats in modes.items():
+            print(
+                f"{name} {mode}: {stats['features']}, {stats['matrix_kb']:.0f}, "
+                f"{stats['featurize_seconds']:.2f}, {stats['train_seconds']:.2f}, {stats['accuracy']:.3f}"
+            )
+            print(", ".join(f"{member} {accuracy:.3f}" for member, accuracy in stats["members"].items()))
+    return report
@@ -0,0 +1,113 @@
+"""
+This module builds the sparse feature matrices used to train
+the classifiers and to classify the verdicts.
+
+In the vocabulary mode, each feature is one of the most common
+words of the training verdicts. In the hashing mode, tokens are
+hashed straight into HASH_FEATURES columns instead.
+
+The crime and result types are classified from a single matrix
+over the union of their words, sliced into the columns of each.
+"""
+
+from typing import Iterable
+from typing import List
+from typing import Union
+
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction import FeatureHasher
+import numpy as np
+
+from classify.HashedWords import HashedWords
+from classify.Verdict import Verdict
+from constants import FEATURE_MODE
+from profiling import profiled
+
+
+SELECTED_FEATURE_MODE = FEATURE_MODE
+
+Words = Union[List[str], HashedWords]
+
+
+def get_feature_mode() -> str:
+    return SELECTED_FEATURE_MODE
+
+
+def set_feature_mode(mode: str):
+    global SELECTED_FEATURE_MODE
+    SELECTED_FEATURE_MODE = mode
+
+
+@profiled("get_feature_matrix")
+def get_feature_matrix(verdicts: Iterable[Verdict], words: Words) -> csr_matrix:
+    """
+    Builds a documents x words matrix in which each row flags
+    which of the words are among the verdict tokens.
+    Rows follow the order of verdicts and columns the order of words.
+    """
+    if isinstance(words, HashedWords):
+        return get_hashed_matrix(verdicts, words.n_features)
+
+    index = {word: i for i, word in enumerate(words)}
+    indptr = [0]
+    indices = []
+    for verdict in verdicts:
+        columns = {index[t] for t in verdict.tokens if t in index}
+        indices.extend(sorted(columns))
+        indptr.append(len(indices))
+
+    data = np.ones(len(indices), dtype=np.float64)
+    shape = (len(indptr) - 1, len(words))
+    return csr_matrix(
+        (data, np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+        shape=shape
+    )
+
+
+def get_union_words(task_words: List[Words]) -> Words:
+    """
+    Returns the words of all tasks, each one once, in the order they
+    first appear, or the hashed words they share in the hashing mode.
+    """
+    if isinstance(task_words[0], HashedWords):
+        return task_words[0]
+    return list(dict.fromkeys(word for words in task_words for word in words))
+
+
+def slice_words(matrix: csr_matrix, union: Words, words: Words) -> csr_matrix:
+    """
+    Returns the columns of the union words matrix that are the words, in their order.
+    """
+    if isinstance(union, HashedWords):
+        return matrix
+    index = {word: i for i, word in enumerate(union)}
+    columns = [index[word] for word in words]
+    if columns == list(range(len(columns))):
+        return matrix[:, :len(columns)]
+    sliced = matrix[:, columns]
+    sliced.sort_indices()
+    return sliced
+
+
+def get_task_features(verdicts: List[Verdict], task_words: List[Words]) -> List[csr_matrix]:
+    """
+    Builds one feature matrix over the union of the task_words,
+    reading each verdict tokens once, and returns its columns of each task.
+    """
+    union = get_union_words(task_words)
+    matrix = get_feature_matrix(verdicts, union)
+    return [slice_words(matrix, union, words) for words in task_words]
+
+
+def get_hashed_matrix(verdicts: Iterable[Verdict], n_features: int) -> csr_matrix:
+    """
+    Builds a documents x n_features matrix in which each row flags
+    the columns the verdict tokens hash to.
+    """
+    tokens = [set(verdict.tokens) for verdict in verdicts]
+    if not tokens:
+        return csr_matrix((0, n_features), dtype=np.float64)
+    hasher = FeatureHasher(n_features, input_type="string", alternate_sign=False)
+    matrix = hasher.transform(tokens).tocsr()
+    matrix.data[:] = 1
+    return matrix
@@ -6,27 +6,30 @@ Results are stored in a .csv file.
 """
 
 from typing import Tuple
-import os
 
 import pandas as pd
 
 from classify.Enums import CrimeTypeEnum
 from classify.Enums import ResultTypeEnum
 from constants import HUMAN_DIR
-from constants import TXT_DIR
+from corpus import read_verdict
 from csv_utils import get_dataframe
 from csv_utils import save_list_as_csv
+from labels import HUMAN
+from labels import add_labels
 
 
 def human_classification(sample_size: int, random_state: int):
     """
     Gets a sample of sample_size of the scrapped data, from
     a random state of random_state and prompts the user to
-    classify it manually, saving the results in a .csv file.
+    classify it manually, saving the results in a .csv file
+    and adding them to the training labels.
     """
     df = get_dataframe()
     sample = df.sample(n=sample_size, random_state=random_state)
-    classify_files(sample)
+    outpath = classify_files(sample)
+    add_labels(outpath, HUMAN)
 
 
 def classify_files(df: pd.DataFrame):
@@ -47,19 +50,16 @@ def classify_single_file(fileid: str) -> Tuple[str, str]:
     """
     Reads a file and prompts the user to classify it.
     """
-    filepath = os.path.join(TXT_DIR, f"{fileid}.txt")
-    print_file(filepath)
+    print_verdict(fileid)
     crime_type, result_type = prompt_user()
     return crime_type, result_type
 
 
-def print_file(filepath: str):
+def print_verdict(fileid: str):
     """
-    Prints the file content to stdout.
+    Prints the verdict text content to stdout.
     """
-    with open(filepath) as f:
-        content = f.read()
-    print(content)
+    print(read_verdict(fileid))
 
 
 def prompt_user(crime_type: str = "", result_type: str = "") -> Tuple[str, str]:
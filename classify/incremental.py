@@ -0,0 +1,117 @@
+"""
+This module updates the saved models with the labels added to
+the training data since they were trained, without retraining them.
+
+The new labelled verdicts get features from the saved vocabularies.
+The naive bayes member learns only from them with partial_fit, its
+counts ending as if refit, while the linear members are refit on
+the saved training features plus the new ones. The random forest
+and the vocabularies are left as they are until the next full
+retrain, which happens every FULL_RETRAIN_UPDATES updates or
+when a trained label changed.
+"""
+
+from typing import Tuple
+import time
+
+from scipy.sparse import csr_matrix
+from scipy.sparse import vstack
+import numpy as np
+
+from classify.classifiers import PARTIAL_FIT
+from classify.classifiers import REFIT
+from classify.classifiers import get_accuracy
+from classify.Enums import CrimeTypeEnum
+from classify.Enums import ResultTypeEnum
+from classify.features import get_task_features
+from classify.features import get_feature_mode
+from classify.models import Models
+from classify.models import load_artifact
+from classify.models import save_models
+from classify.Verdict import Verdict
+from classify.Verdict import get_tokenizer
+from classify.VoteClassifier import VoteClassifier
+from constants import FULL_RETRAIN_UPDATES
+from corpus import read_verdict
+from labels import read_training_labels
+
+
+# Artifact key, label values and training data column of each type
+TASKS = [("crime", CrimeTypeEnum, 0), ("result", ResultTypeEnum, 1)]
+
+
+def update_models(model_path: str, training_path: str, fingerprint: str) -> Models:
+    """
+    Folds the labels added to the training data into the models
+    saved at model_path and saves them again with fingerprint.
+    Returns the updated models, or None if they must be fully retrained.
+    """
+    artifact = load_artifact(model_path)
+    if artifact is None or artifact.get("training") is None:
+        return None
+    if artifact.get("tokenizer") != get_tokenizer() or artifact.get("features") != get_feature_mode():
+        return None
+
+    training = artifact["training"]
+    if training["updates"] + 1 >= FULL_RETRAIN_UPDATES:
+        print(f"Models at {model_path} were updated {training['updates']} times, retraining on schedule.")
+        return None
+
+    labels = read_training_labels(training_path)
+    trained = training["labels"]
+    if any(labels.get(full_id) != label for full_id, label in trained.items()):
+        print(f"Labels the models at {model_path} were trained on changed.")
+        return None
+
+    start = time.perf_counter()
+    new_ids = [full_id for full_id in labels if full_id not in trained]
+    verdicts = [Verdict(read_verdict(full_id), full_id) for full_id in new_ids]
+    task_features = get_task_features(verdicts, [artifact[name][0] for name, _, _ in TASKS])
+    for (name, enum, column), all_features in zip(TASKS, task_features):
+        _, vote_classifier = artifact[name]
+        values = {str(m.value) for m in enum}
+        rows = [row for row, full_id in enumerate(new_ids) if labels[full_id][column] in values]
+        features = all_features[rows]
+        features_labels = np.array([int(labels[new_ids[row]][column]) for row in rows], dtype=int)
+        if not set(features_labels.tolist()) <= set(vote_classifier.classifiers[0].classes_.tolist()):
+            print(f"New {name} type labels are not known by the models at {model_path}.")
+            return None
+        train, test = training[name]
+        training[name] = update_classifier(vote_classifier, train, test, features, features_labels), test
+
+    training["labels"] = labels
+    training["updates"] += 1
+    models = (*artifact["crime"], *artifact["result"])
+    save_models(model_path, fingerprint, models, training)
+    elapsed = time.perf_counter() - start
+    print(f"Updated models at {model_path} with {len(new_ids)} new labels in {elapsed:.2f}s")
+    return models
+
+
+def update_classifier(
+    vote_classifier: VoteClassifier,
+    train: Tuple[csr_matrix, np.ndarray],
+    test: Tuple[csr_matrix, np.ndarray],
+    features: csr_matrix,
+    labels: np.ndarray
+) -> Tuple[csr_matrix, np.ndarray]:
+    """
+    Updates the members of the vote classifier with the new features
+    and prints their accuracy on the testing set.
+    Returns the training features and labels with the new ones added.
+    """
+    train_features, train_labels = train
+    if features.shape[0]:
+        train_features = vstack([train_features, features], format="csr")
+        train_labels = np.concatenate([train_labels, labels])
+
+    test_features, test_labels = test
+    for classifier in vote_classifier.classifiers:
+        if features.shape[0] and isinstance(classifier, PARTIAL_FIT):
+            classifier.partial_fit(features, labels)
+        elif features.shape[0] and isinstance(classifier, REFIT):
+            classifier.fit(train_features, train_labels)
+        print(classifier, get_accuracy(classifier.predict(test_features), test_labels))
+    vote_classifier.measure_costs(test_features)
+    print("voted: ", get_accuracy(vote_classifier.classify_many(test_features), test_labels))
+    return train_features, train_labels
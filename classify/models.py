@@ -0,0 +1,94 @@
+"""
+This module saves and loads the trained crime and result
+vote classifiers, with their vocabularies, as a single
+versioned model file.
+
+The file also keeps the training state the models can be updated
+from: the labels they were trained on, their training and testing
+features, and how many updates they went through since trained.
+"""
+
+from datetime import datetime
+from hashlib import sha256
+from typing import Dict
+from typing import Tuple
+import os
+import pickle
+
+from classify.features import Words
+from classify.features import get_feature_mode
+from classify.Verdict import get_tokenizer
+from classify.VoteClassifier import VoteClassifier
+from constants import MODEL_VERSION
+
+
+Models = Tuple[Words, VoteClassifier, Words, VoteClassifier]
+
+
+def get_fingerprint(training_path: str) -> str:
+    """
+    Returns the sha256 hex digest of the training data file.
+    """
+    digest = sha256()
+    with open(training_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_models(model_path: str, fingerprint: str, models: Models, training: Dict = None):
+    """
+    Pickles the models along with the model version, the tokenizer,
+    the feature mode, the fingerprint of the training data they were trained on
+    and their training state.
+    """
+    crime_words, crime_classifier, result_words, result_classifier = models
+    artifact = {
+        "version": MODEL_VERSION,
+        "fingerprint": fingerprint,
+        "tokenizer": get_tokenizer(),
+        "features": get_feature_mode(),
+        "trained_at": datetime.utcnow().isoformat(),
+        "crime": (crime_words, crime_classifier),
+        "result": (result_words, result_classifier),
+        "training": training,
+    }
+    folder = os.path.dirname(model_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmppath = f"{model_path}.tmp"
+    with open(tmppath, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmppath, model_path)
+
+
+def load_artifact(model_path: str) -> Dict:
+    """
+    Unpickles the model file. Returns None if the file does not
+    exist or was saved by another MODEL_VERSION.
+    """
+    if not os.path.exists(model_path):
+        return None
+    with open(model_path, "rb") as f:
+        artifact = pickle.load(f)
+    if artifact.get("version") != MODEL_VERSION:
+        return None
+    return artifact
+
+
+def load_models(model_path: str, fingerprint: str) -> Models:
+    """
+    Loads the models from model_path. Returns None if they are missing,
+    outdated, or were trained on data with a different fingerprint,
+    tokenized with another tokenizer or in another feature mode.
+    """
+    artifact = load_artifact(model_path)
+    if artifact is None or artifact["fingerprint"] != fingerprint:
+        return None
+    if artifact.get("tokenizer", "nltk") != get_tokenizer():
+        return None
+    if artifact.get("features", "vocabulary") != get_feature_mode():
+        return None
+    crime_words, crime_classifier = artifact["crime"]
+    result_words, result_classifier = artifact["result"]
+    return crime_words, crime_classifier, result_words, result_classifier
@@ -0,0 +1,146 @@
+"""
+This module provides a local HTTP service classifying verdicts
+with models trained beforehand, loaded once when it starts.
+
+Run it with python main.py serve and POST a json object with either
+the verdict "texts" or the "full_ids" of stored verdicts to /classify:
+
+curl -d '{"texts": ["..."]}' http://127.0.0.1:<port>/classify
+
+Each verdict gets its crime and result types and confidences, null
+when under CONFIDENCE. The documents of concurrent requests are
+classified together by a MicroBatcher. GET /metrics returns the
+latency percentiles and throughput.
+"""
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Dict
+from typing import List
+import json
+import re
+
+from classify.features import get_task_features
+from classify.MicroBatcher import MicroBatcher
+from classify.models import Models
+from classify.Verdict import Verdict
+from constants import CONFIDENCE
+from constants import SERVE_BATCH_SIZE
+from constants import SERVE_LATENCY_WINDOW
+from corpus import has_verdict
+from corpus import read_verdict
+
+
+# The file id digits followed by the file hash, as parse_page builds full_ids
+FULL_ID_PATTERN = re.compile(r"[0-9a-zA-Z]+")
+
+
+class ClassifyHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self.reply(200, self.server.batcher.metrics())
+        elif self.path == "/health":
+            self.reply(200, {"status": "ok"})
+        else:
+            self.reply(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/classify":
+            self.reply(404, {"error": "Not found"})
+            return
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            verdicts = get_request_verdicts(body)
+        except (ValueError, TypeError) as e:
+            self.reply(400, {"error": str(e)})
+            return
+
+        try:
+            classifications = self.server.batcher.classify(verdicts)
+        except Exception as e:
+            self.reply(500, {"error": str(e)})
+            return
+        self.reply(200, {"classifications": classifications})
+
+    def reply(self, status: int, body: Dict):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get_request_verdicts(body: Dict) -> List[Verdict]:
+    """
+    Returns the verdicts of the request texts, or of its stored full_ids.
+    Raises ValueError if it has neither as a list of strings, or some
+    full_id is malformed or not stored.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Expected a json object")
+    key = "texts" if "texts" in body else "full_ids"
+    values = body.get(key)
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError("Expected texts or full_ids as a list of strings")
+    if key == "texts":
+        return [Verdict(text) for text in values]
+
+    malformed = [full_id for full_id in values if not FULL_ID_PATTERN.fullmatch(full_id)]
+    if malformed:
+        raise ValueError(f"Malformed full_ids: {', '.join(malformed)}")
+    missing = [full_id for full_id in values if not has_verdict(full_id)]
+    if missing:
+        raise ValueError(f"Verdicts not found: {', '.join(missing)}")
+    return [Verdict(read_verdict(full_id), full_id) for full_id in values]
+
+
+def classify_verdicts(verdicts: List[Verdict], models: Models) -> List[Dict]:
+    """
+    Classifies the verdicts crime and result types.
+    """
+    crime_words, crime_classifier, result_words, result_classifier = models
+    crime_features, result_features = get_task_features(verdicts, [crime_words, result_words])
+    crime = crime_classifier.safe_classify_many(crime_features, CONFIDENCE)
+    result = result_classifier.safe_classify_many(result_features, CONFIDENCE)
+    return [
+        {
+            "full_id": verdict.full_id or None,
+            "crime_type": crime_type,
+            "crime_confidence": crime_confidence,
+            "result_type": result_type,
+            "result_confidence": result_confidence,
+        }
+        for verdict, (crime_type, crime_confidence), (result_type, result_confidence) in zip(verdicts, crime, result)
+    ]
+
+
+def get_server(port: int, models: Models, max_wait: float, max_size: int = SERVE_BATCH_SIZE) -> ThreadingHTTPServer:
+    """
+    Returns the classification service, whose batcher waits at most
+    max_wait seconds for up to max_size documents to classify at once.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), ClassifyHandler)
+    server.batcher = MicroBatcher(
+        lambda verdicts: classify_verdicts(verdicts, models),
+        max_size,
+        max_wait,
+        SERVE_LATENCY_WINDOW
+    )
+    return server
+
+
+def serve(port: int, models: Models, max_wait: float):
+    server = get_server(port, models, max_wait)
+    server.batcher.start()
+    print(f"Classification service listening on http://127.0.0.1:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        server.batcher.stop()
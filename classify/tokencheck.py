@@ -0,0 +1,105 @@
+"""
+This module checks the tokenizers against each other on
+the training set verdicts and benchmarks each of them.
+
+nltk is the reference tokenizer. The report shows how many
+verdicts get the exact same tokens from both, which tokens
+each one produces that the other doesn't, and how much the
+vocabularies, and their FEATS_LEN most common words, differ.
+"""
+
+from collections import Counter
+from typing import Dict
+from typing import List
+from typing import Tuple
+import time
+
+from classify.Verdict import TOKENIZERS
+from classify.Verdict import Verdict
+from constants import FEATS_LEN
+from constants import FULL_TRAIN_DATA_PATH
+from corpus import has_verdict
+from corpus import read_verdict
+
+
+def load_training_texts(training_path: str = FULL_TRAIN_DATA_PATH) -> List[str]:
+    """
+    Returns the preprocessed text of each stored verdict of the training data.
+    """
+    with open(training_path) as f:
+        full_ids = {line.split(";")[0] for line in f if line.strip()}
+    return [Verdict(read_verdict(full_id)).text for full_id in sorted(full_ids) if has_verdict(full_id)]
+
+
+def compare_tokenizers(texts: List[str], reference: str = "nltk", candidate: str = "regex") -> Dict:
+    """
+    Tokenizes the texts with both tokenizers and returns their differences.
+    """
+    identical = 0
+    reference_counts, candidate_counts = Counter(), Counter()
+    for text in texts:
+        expected = TOKENIZERS[reference](text)
+        tokens = TOKENIZERS[candidate](text)
+        identical += tokens == expected
+        reference_counts.update(expected)
+        candidate_counts.update(tokens)
+
+    reference_top = {word for word, _ in reference_counts.most_common(FEATS_LEN)}
+    candidate_top = {word for word, _ in candidate_counts.most_common(FEATS_LEN)}
+    return {
+        "documents": len(texts),
+        "identical_documents": identical,
+        "reference_tokens": sum(reference_counts.values()),
+        "candidate_tokens": sum(candidate_counts.values()),
+        "missing_tokens": (reference_counts - candidate_counts).most_common(),
+        "extra_tokens": (candidate_counts - reference_counts).most_common(),
+        "reference_vocabulary": len(reference_counts),
+        "candidate_vocabulary": len(candidate_counts),
+        "shared_vocabulary": len(reference_counts.keys() & candidate_counts.keys()),
+        "shared_top_words": len(reference_top & candidate_top),
+    }
+
+
+def benchmark_tokenizer(name: str, texts: List[str], rounds: int) -> Tuple[float, float]:
+    """
+    Tokenizes the texts rounds times and returns the documents and tokens per second.
+    """
+    tokens = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            tokens += len(TOKENIZERS[name](text))
+    elapsed = time.perf_counter() - start
+    if not elapsed:
+        return 0, 0
+    return len(texts) * rounds / elapsed, tokens / elapsed
+
+
+def check_tokenizers(rounds: int = 3) -> Dict:
+    """
+    Compares and benchmarks the tokenizers on the training set verdicts.
+    Returns the comparison of the regex tokenizer to the nltk one.
+    """
+    texts = load_training_texts()
+    if not texts:
+        print(f"No stored verdicts found for the training data in {FULL_TRAIN_DATA_PATH}")
+        return {}
+
+    report = compare_tokenizers(texts)
+    print(f"{report['identical_documents']} of {report['documents']} verdicts got the same tokens")
+    print(f"tokens: nltk {report['reference_tokens']}, regex {report['candidate_tokens']}")
+    print(
+        f"vocabulary: nltk {report['reference_vocabulary']}, regex {report['candidate_vocabulary']}, "
+        f"shared {report['shared_vocabulary']}"
+    )
+    print(f"{report['shared_top_words']} of the {FEATS_LEN} most common words shared")
+    print(f"most missed by regex: {report['missing_tokens'][:15]}")
+    print(f"most added by regex: {report['extra_tokens'][:15]}")
+
+    speeds = {}
+    for name in TOKENIZERS:
+        speeds[name] = benchmark_tokenizer(name, texts, rounds)
+        print(f"{name}: {speeds[name][0]:.1f} documents/s, {speeds[name][1]:.0f} tokens/s")
+    if speeds["nltk"][0]:
+        print(f"regex speedup: {speeds['regex'][0] / speeds['nltk'][0]:.1f}x")
+    return report
@@ -19,6 +19,9 @@ COURTS = {
 }
 
 # Csv
+CHECKPOINT_LINES = 500 # Lines streamed to a .csv between fsyncs
+MERGE_MAX_IDS = 2_000_000 # Ids kept in memory by merge before spilling them to disk, about 16 bytes each
+MERGED_MANIFEST = "merged.txt" # Raw files already merged, kept in the raw folder
 OUT_CSV_NAMES = [
     "full_id",
     "crime_type",
@@ -54,25 +57,90 @@ LOGS_DIR = os.path.join(DATA_DIR, "logs")
 HUMAN_DIR = os.path.join(DATA_DIR, "human")
 TRAIN_DIR = os.path.join(DATA_DIR, "train")
 OUT_DIR = os.path.join(DATA_DIR, "out")
+TOKENS_DIR = os.path.join(DATA_DIR, "tokens")
+MODELS_DIR = os.path.join(DATA_DIR, "models")
+BENCH_DIR = os.path.join(DATA_DIR, "bench")
+PROFILE_DIR = os.path.join(DATA_DIR, "profile")
 
 # Files
 CSV_DATA_PATH = os.path.join(DATA_DIR, "data.csv")
+CATALOGUE_PATH = os.path.join(DATA_DIR, "catalogue.db")
 FULL_TRAIN_DATA_PATH = os.path.join(TRAIN_DIR, "full.csv")
+LABELS_PATH = os.path.join(TRAIN_DIR, "labels.db")
 OUTPUT_PATH = os.path.join(DATA_DIR, "output.csv")
 TRAIN_DATA_PATH = os.path.join(TRAIN_DIR, "train.csv")
+PACK_DATA_PATH = os.path.join(DATA_DIR, "corpus.pack")
+PACK_INDEX_PATH = os.path.join(DATA_DIR, "corpus.idx")
+MODEL_PATH = os.path.join(MODELS_DIR, "model.pkl")
 
 # Scrap
 RETRY_WAIT_SECS = 30
 MAX_RETRIES = 3
+REQUEST_TIMEOUT = 30 # Seconds a request may wait to connect, or for each read, before it is retried
 BASE_URL = "https://www5.tjmg.jus.br/jurisprudencia/"
 COUNTY = 24 # 24 is Belo Horizonte
 EMPTY_RESULT = "Nenhum registro foi encontrado."
 QUERY = "crime"
+DOWNLOAD_CONCURRENCY = 8 # Verdicts downloaded at once
+DOWNLOAD_RATE = 4.0 # Max download requests per second
+STANDIN_PORT = 8000
+SERVE_PORT = 8001
+SERVE_BATCH_SIZE = 64 # Max documents the classification service classifies at once
+SERVE_MAX_WAIT = 0.01 # Max seconds a document waits for others to be batched with
+SERVE_LATENCY_WINDOW = 10000 # Latest requests the latency percentiles are computed over
+SEARCH_CONCURRENCY = 4 # Initial search requests in flight, adapted to the server answers
+SEARCH_MAX_CONCURRENCY = 16
+PARSER_ENGINE = "lxml" # Falls back to "bs4" if lxml is not installed
+PREFETCH_PAGES = 2 # Search pages requested ahead of the page being parsed
+
+# Corpus
+PACK_COMPRESS_LEVEL = 6 # zlib level of the verdicts packed with --compress
 
 # Classify
+BATCH_SIZE = 256 # Documents classified per VoteClassifier call
 CONFIDENCE = 0.75
 DEFAULT_SAMPLE = 10
 FEATS_LEN = 3000
+FEATURE_MODES = ["vocabulary", "hashing"]
+FEATURE_MODE = "vocabulary" # "vocabulary" of the FEATS_LEN most common words or "hashing" of every token
+HASH_FEATURES = 2 ** 14 # Feature columns of the hashing mode, the random forest trains slower the more there are
+VOCAB_MIN_DF = 1 # Min verdicts a word must be found in to be a feature
+VOCAB_MAX_DF = 1.0 # Max share of the verdicts a word may be found in to be a feature
+VOCAB_SKETCH_WIDTH = 0 # Count-min sketch counters per row for the vocabulary, 0 counts exactly
+VOCAB_SKETCH_DEPTH = 4 # Count-min sketch rows
+TRAIN_JOBS = -1 # Threads training the classifiers of both types at once, -1 uses every cpu
+MEMBER_JOBS = 1 # n_jobs of the classifiers supporting it
+MODEL_VERSION = 3 # Bump when the saved model layout changes
+FULL_RETRAIN_UPDATES = 10 # Incremental model updates before a full retrain
+TOKENS_CACHE_SIZE = 2048 # Verdicts kept in memory by the token cache
+TOKENIZER = "nltk" # "nltk" or "regex", the faster single regex pass
+
+# Bench
+BENCH_SIZES = [1_000, 10_000, 100_000] # Synthetic documents of each benchmark run
+BENCH_DOC_WORDS = 400 # Words of each synthetic verdict
+BENCH_SIGNAL = 0.01 # Share of the words of a synthetic verdict telling its types apart
+BENCH_DUPLICATES = 0.1 # Share of repeated lines in the synthetic raw .csv files
+BENCH_PAGE_RESULTS = 10 # Results listed in each synthetic search page
+PARSECHECK_SYNTHETIC_RESULTS = 1_000 # Results of the synthetic search pages checked when none are saved
+STARTUP_RUNS = 5 # Fresh interpreters started to measure each command startup time
+STARTUP_BUDGETS = { # Max seconds each command may take to import its modules
+    "scrap": 0.5,
+    "parsers": 0.5,
+    "tokenizers": 3.0,
+    "features": 3.0,
+    "merge": 0.3,
+    "catalogue": 0.3,
+    "download": 0.5,
+    "standin": 0.3,
+    "pack": 0.3,
+    "human": 1.0,
+    "labels": 0.3,
+    "train": 3.0,
+    "classify": 3.0,
+    "bench": 4.0,
+    "startup": 0.3,
+    "serve": 3.0,
+}
 
 
 if __name__ == "__main__":
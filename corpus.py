@@ -0,0 +1,174 @@
+"""
+This is a module to store and read the verdicts text content.
+
+Verdicts may be stored in a packed corpus, made of one data file
+holding every text, optionally zlib compressed, and one index file
+mapping each full_id to its offset and length in the data file.
+The data file is read through mmap.
+
+Verdicts not found in the packed corpus are read from their
+.txt file in TXT_DIR, so both layouts can be used transparently.
+Once a packed corpus exists, new verdicts are appended to it.
+"""
+
+from threading import Lock
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+import mmap
+import os
+import zlib
+
+from constants import PACK_COMPRESS_LEVEL
+from constants import PACK_DATA_PATH
+from constants import PACK_INDEX_PATH
+from constants import TXT_DIR
+
+
+class PackedCorpus:
+
+    def __init__(self, data_path: str, index_path: str):
+        self.data_path = data_path
+        self.index_path = index_path
+        self.index = self.read_index()
+        self.lock = Lock()
+        self.mm = None
+        self.mm_size = 0
+
+    def read_index(self) -> Dict[str, Tuple[int, int, bool]]:
+        """
+        Reads the index file, where each line is formatted as
+        full_id;offset;length;compressed. Later lines for the
+        same full_id override the earlier ones.
+        """
+        index = {}
+        if not os.path.exists(self.index_path):
+            return index
+        with open(self.index_path) as f:
+            for line in f:
+                fields = line.strip().split(";")
+                if len(fields) != 4:
+                    continue
+                full_id, offset, length, compressed = fields
+                index[full_id] = (int(offset), int(length), compressed == "1")
+        return index
+
+    def remap(self, size: int):
+        """
+        Maps the data file again if it grew past the mapped size.
+        """
+        if size <= self.mm_size:
+            return
+        if self.mm is not None:
+            self.mm.close()
+        with open(self.data_path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.mm_size = len(self.mm)
+
+    def read(self, full_id: str) -> str:
+        """
+        Decodes the text straight from the mapped data file.
+        """
+        offset, length, compressed = self.index[full_id]
+        if length == 0:
+            return ""
+        self.remap(offset + length)
+        with memoryview(self.mm) as view:
+            with view[offset:offset + length] as content:
+                if compressed:
+                    return zlib.decompress(content).decode()
+                return str(content, "utf-8")
+
+    def write(self, items: Iterable[Tuple[str, str]], compress: bool = False) -> int:
+        """
+        Appends each (full_id, text) item to the data file
+        and its entry to the index file.
+        Returns the number of items written.
+        """
+        written = 0
+        with self.lock, open(self.data_path, "ab") as data, open(self.index_path, "a") as index:
+            for full_id, text in items:
+                content = text.encode()
+                if compress:
+                    content = zlib.compress(content, PACK_COMPRESS_LEVEL)
+                offset = data.tell()
+                data.write(content)
+                index.write(f"{full_id};{offset};{len(content)};{int(compress)}\n")
+                self.index[full_id] = (offset, len(content), compress)
+                written += 1
+        return written
+
+
+PACKED_CORPUS = None
+
+
+def get_packed_corpus() -> PackedCorpus:
+    """
+    Returns the packed corpus, or None if it was never created.
+    """
+    global PACKED_CORPUS
+    if PACKED_CORPUS is None and os.path.exists(PACK_INDEX_PATH):
+        PACKED_CORPUS = PackedCorpus(PACK_DATA_PATH, PACK_INDEX_PATH)
+    return PACKED_CORPUS
+
+
+def has_verdict(full_id: str) -> bool:
+    packed = get_packed_corpus()
+    if packed is not None and full_id in packed.index:
+        return True
+    return os.path.exists(os.path.join(TXT_DIR, f"{full_id}.txt"))
+
+
+def read_verdict(full_id: str) -> str:
+    """
+    Returns the text content of the verdict.
+    """
+    packed = get_packed_corpus()
+    if packed is not None and full_id in packed.index:
+        return packed.read(full_id)
+    return read_txt(full_id)
+
+
+def list_verdict_ids() -> List[str]:
+    """
+    Returns the full_id of all stored verdicts, the packed
+    ones first, in the order they were packed.
+    """
+    packed = get_packed_corpus()
+    ids = list(packed.index) if packed is not None else []
+    if os.path.isdir(TXT_DIR):
+        known = set(ids)
+        txt_ids = (f.replace(".txt", "") for f in os.listdir(TXT_DIR) if f.endswith(".txt"))
+        ids.extend(full_id for full_id in txt_ids if full_id not in known)
+    return ids
+
+
+def save_verdict(full_id: str, text: str):
+    """
+    Saves the verdict text in the packed corpus if there
+    is one, or in a .txt file in TXT_DIR otherwise.
+    """
+    packed = get_packed_corpus()
+    if packed is not None:
+        packed.write([(full_id, text)])
+        return
+    with open(os.path.join(TXT_DIR, f"{full_id}.txt"), "w") as f:
+        f.write(text)
+
+
+def pack_txt_dir(compress: bool = False):
+    """
+    Imports every .txt verdict in TXT_DIR not yet packed into the packed corpus.
+    """
+    global PACKED_CORPUS
+    PACKED_CORPUS = PackedCorpus(PACK_DATA_PATH, PACK_INDEX_PATH)
+    txt_ids = [f.replace(".txt", "") for f in os.listdir(TXT_DIR) if f.endswith(".txt")]
+    full_ids = [full_id for full_id in txt_ids if full_id not in PACKED_CORPUS.index]
+    packed = PACKED_CORPUS.write(((full_id, read_txt(full_id)) for full_id in full_ids), compress)
+    print(f"Packed {packed} documents into {PACK_DATA_PATH}")
+
+
+def read_txt(full_id: str) -> str:
+    with open(os.path.join(TXT_DIR, f"{full_id}.txt")) as f:
+        return f.read()
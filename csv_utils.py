@@ -2,18 +2,33 @@
 This is a module for csv related util functions.
 """
 
+from __future__ import annotations
+from array import array
 from datetime import datetime
+from hashlib import blake2b
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Set
+from typing import TYPE_CHECKING
 import os
+import sqlite3
+import tempfile
 
-import pandas as pd
-
+from catalogue import catalogue_exists
+from catalogue import get_downloaded_dataframe
+from catalogue import upsert_verdicts
+from constants import CHECKPOINT_LINES
 from constants import CSV_DATA_PATH
 from constants import DATA_DIR
-from constants import FULL_TRAIN_DATA_PATH
+from constants import MERGE_MAX_IDS
+from constants import MERGED_MANIFEST
 from constants import RAW_CSV_NAMES
 from constants import RAW_DIR
-from constants import TXT_DIR
+from corpus import list_verdict_ids
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def save_list_as_csv(folder: str, name_prefix: str, data: List[str]) -> str:
@@ -22,51 +37,211 @@ def save_list_as_csv(folder: str, name_prefix: str, data: List[str]) -> str:
     Each element of the list will be written as a line in the file.
     Returns the saved file path.
     """
-    now = str(datetime.utcnow().timestamp()).replace(".", "")
-    filepath = os.path.join(folder, f"{name_prefix}_{now}.csv")
+    filepath = get_unique_csv_path(folder, name_prefix)
     with open(filepath, "w") as f:
         f.write("\n".join(data))
     return filepath
 
 
-def merge_csvs(folder: str = RAW_DIR, prefix: str = "raw"):
+def get_unique_csv_path(folder: str, name_prefix: str) -> str:
+    """
+    Returns a .csv file path in folder with a unique, timestamped, filename.
+    """
+    now = str(datetime.utcnow().timestamp()).replace(".", "")
+    return os.path.join(folder, f"{name_prefix}_{now}.csv")
+
+
+def get_latest_csv_path(folder: str, name_prefix: str) -> str:
+    """
+    Returns the path of the most recently modified .csv file
+    in folder starting with name_prefix, or "" if there is none.
+    """
+    if not os.path.isdir(folder):
+        return ""
+    files = [f for f in os.listdir(folder) if f.startswith(f"{name_prefix}_") and f.endswith(".csv")]
+    if not files:
+        return ""
+    return max((os.path.join(folder, f) for f in files), key=os.path.getmtime)
+
+
+def stream_lines_to_csv(filepath: str, lines: Iterable[str], checkpoint: int = CHECKPOINT_LINES) -> int:
+    """
+    Appends each line to the .csv file at filepath as soon as it is produced.
+    Every checkpoint lines the file is flushed and fsynced, so a crash
+    loses at most the lines written since the last checkpoint.
+    Returns the number of lines written.
+    """
+    written = 0
+    with open(filepath, "a") as f:
+        for line in lines:
+            f.write(f"{line}\n")
+            written += 1
+            if written % checkpoint == 0:
+                f.flush()
+                os.fsync(f.fileno())
+        f.flush()
+        os.fsync(f.fileno())
+    return written
+
+
+def recover_csv_ids(filepath: str) -> Set[str]:
+    """
+    Reads the ids (first field) of the complete lines of an
+    interrupted .csv file. As streamed lines always end in a newline,
+    a last line without one is partial and is truncated, so the file
+    can be appended to again. In files written before streaming, that
+    is their complete last line, whose document is then classified again.
+    """
+    with open(filepath, "rb+") as f:
+        content = f.read()
+        complete = content[:content.rfind(b"\n") + 1]
+        if len(complete) != len(content):
+            f.truncate(len(complete))
+    lines = complete.decode().splitlines()
+    return {line.split(";")[0] for line in lines if line}
+
+
+class IdSet:
+    """
+    Set of full_ids kept as 8 byte digests in an open addressing
+    table, an array twice as long as max_size, so each id takes
+    about 16 bytes. Past max_size ids the set is spilled to a SQLite
+    table in a temporary file, so its memory stays bounded however
+    many ids are added.
+    """
+
+    def __init__(self, max_size: int, folder: str):
+        self.max_size = max_size
+        self.folder = folder
+        self.mask = (1 << (2 * max_size - 1).bit_length()) - 1
+        self.slots = array("q", [0]) * (self.mask + 1) # Digests at their probed slot, 0 if empty
+        self.size = 0
+        self.spill = None
+        self.spill_path = ""
+
+    def add(self, full_id: str) -> bool:
+        """
+        Adds the id to the set. Returns False if it was already there.
+        """
+        digest = int.from_bytes(blake2b(full_id.encode(), digest_size=8).digest(), "big", signed=True) or 1
+        if self.spill is not None:
+            cursor = self.spill.execute("INSERT OR IGNORE INTO ids VALUES (?)", (digest,))
+            return cursor.rowcount == 1
+
+        slot = digest & self.mask
+        while self.slots[slot]:
+            if self.slots[slot] == digest:
+                return False
+            slot = (slot + 1) & self.mask
+        self.slots[slot] = digest
+        self.size += 1
+        if self.size > self.max_size:
+            self.spill_to_disk()
+        return True
+
+    def spill_to_disk(self):
+        fd, self.spill_path = tempfile.mkstemp(suffix=".db", dir=self.folder)
+        os.close(fd)
+        self.spill = sqlite3.connect(self.spill_path)
+        self.spill.execute("PRAGMA journal_mode=OFF")
+        self.spill.execute("PRAGMA synchronous=OFF")
+        self.spill.execute("CREATE TABLE ids (digest INTEGER PRIMARY KEY)")
+        self.spill.executemany("INSERT INTO ids VALUES (?)", ((d,) for d in self.slots if d))
+        self.slots = array("q")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.spill is not None:
+            self.spill.close()
+            os.remove(self.spill_path)
+
+
+def merge_csvs(folder: str = RAW_DIR, prefix: str = "raw", incremental: bool = False):
     """
     Merges the raw csv files scrapped from the search page
-    into one output file.
-    We are storing temporarily all the csvs data in memory to
-    avoid performing tens of thousands of file operations.
+    into one output file, keeping only the first line of each full_id.
+    Lines are streamed from the raw files to the output file, so
+    memory is bounded by the ids set, not by the data size.
+    When incremental, only the raw files added since the last merge
+    are read and their new lines are appended to the output file.
     """
-    files = [f for f in os.listdir(folder) if f.startswith(prefix) and f.endswith(".csv")]
+    files = sorted(f for f in os.listdir(folder) if f.startswith(prefix) and f.endswith(".csv"))
+    manifest_path = os.path.join(folder, MERGED_MANIFEST)
+    merged = read_merged_manifest(manifest_path) if incremental and os.path.exists(CSV_DATA_PATH) else set()
+    new_files = [f for f in files if f not in merged]
 
-    data = []
-    for _file in files:
-        filepath = os.path.join(folder, _file)
-        with open(filepath) as f:
-            data.append(f.read())
+    with IdSet(MERGE_MAX_IDS, DATA_DIR) as found_ids:
+        if merged:
+            for _ in iter_unique_lines(iter_csv_lines([CSV_DATA_PATH]), found_ids):
+                pass
 
-    data = remove_repeated_lines(data)
-    outpath = os.path.join(DATA_DIR, "data.csv")
-    with open(outpath, "w") as f:
-        f.write("\n".join(data))
+        lines = iter_unique_lines(iter_csv_lines(os.path.join(folder, f) for f in new_files), found_ids)
+        written = write_merged_lines(CSV_DATA_PATH, lines, append=bool(merged))
+
+    with open(manifest_path, "a" if merged else "w") as f:
+        f.writelines(f"{_file}\n" for _file in new_files)
+    print(f"Merged {written} new lines from {len(new_files)} raw files into {CSV_DATA_PATH}")
+
+
+def read_merged_manifest(manifest_path: str) -> Set[str]:
+    """
+    Returns the names of the raw files already merged.
+    """
+    if not os.path.exists(manifest_path):
+        return set()
+    with open(manifest_path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def iter_csv_lines(filepaths: Iterable[str]) -> Iterator[str]:
+    """
+    Yields the non empty lines of each file, one at a time.
+    """
+    for filepath in filepaths:
+        with open(filepath) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
 
 
-def remove_repeated_lines(data: List[str]) -> List[str]:
+def iter_unique_lines(lines: Iterable[str], found_ids: IdSet) -> Iterator[str]:
     """
-    Removes repeated data entries from the data list.
-    A data entry is considered equal to another if both
-    have the same full_id field (position 5, 0 indexed).
+    Yields the data lines whose full_id field (position 5, 0 indexed)
+    was not found before, adding it to found_ids.
     """
-    found_ids = set()
-    filtered_data = []
+    for line in lines:
+        fields = line.split(";")
+        if len(fields) > 5 and found_ids.add(fields[5]):
+            yield line
 
-    for line in data:
-        full_id = line.split(";")[5]
-        if full_id in found_ids:
-            continue
-        found_ids.add(full_id)
-        filtered_data.append(line)
 
-    return filtered_data
+def write_merged_lines(outpath: str, lines: Iterable[str], append: bool) -> int:
+    """
+    Writes each line to outpath as it comes, and to the catalogue
+    if there is one. Returns the number of lines written.
+    """
+    track = catalogue_exists()
+    written = 0
+    batch = []
+    with open(outpath, "a+" if append else "w") as f:
+        if append and f.tell() > 0:
+            f.seek(f.tell() - 1)
+            if f.read(1) != "\n":
+                f.write("\n")
+        for line in lines:
+            f.write(f"{line}\n")
+            written += 1
+            if track:
+                batch.append(line)
+            if len(batch) == CHECKPOINT_LINES:
+                upsert_verdicts(batch)
+                batch = []
+    if batch:
+        upsert_verdicts(batch)
+    return written
 
 
 def get_dataframe() -> pd.DataFrame:
@@ -75,32 +250,15 @@ def get_dataframe() -> pd.DataFrame:
     and loads it into a pandas dataframe. Filters the dataframe,
     removing any verdicts which text wasn't sucessfully downloaded.
     Returns the filtered dataframe.
+    If there is a catalogue, the downloaded verdicts are queried from it instead.
+    pandas is only imported here, so the commands not loading dataframes start faster.
     """
-    downloaded_files = [f.replace(".txt", "") for f in os.listdir(TXT_DIR)]
+    import pandas as pd
+    if catalogue_exists():
+        return get_downloaded_dataframe()
+
+    downloaded_files = list_verdict_ids()
     df = pd.read_csv(CSV_DATA_PATH, sep=";", names=RAW_CSV_NAMES)
     df = df[df["full_id"].isin(downloaded_files)]
     return df
 
-
-def append_to_full_training_csv(data_path: str):
-    """
-    Appends verified data to the full training .csv file,
-    checking if entry isn't already there.
-    """
-    new_entries = []
-
-    with open(data_path) as f:
-        new_csv_content = f.readlines()
-
-    with open(FULL_TRAIN_DATA_PATH) as f:
-        ids = [line.strip().split(";")[0] for line in f.readlines()]
-
-    for line in new_csv_content:
-        _id = line.strip().split(";")[0]
-        if _id not in ids:
-            new_entries.append(line.strip())
-
-    if new_entries:
-        with open(FULL_TRAIN_DATA_PATH, "a") as f:
-            f.write("\n")
-            f.write("\n".join(new_entries))
@@ -0,0 +1,221 @@
+"""
+This is a module for the training label store, an indexed SQLite
+database holding every label ever given to a verdict.
+
+The training data file (full.csv) stays the source of truth and is
+only ever appended to. The store mirrors the labels in use from it,
+re-synced each time it is opened, so labels edited by hand or
+pulled with git are picked up and recorded as imported. The size
+and hash of the synced part of the file are kept, so only the lines
+appended since are read unless the rest of it changed.
+Labels are appended to a history table along with their source
+and timestamp, so a full_id labelled differently over time shows
+as a conflict, to be settled by editing full.csv.
+"""
+
+from datetime import datetime
+from hashlib import blake2b
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+import os
+import sqlite3
+
+from constants import FULL_TRAIN_DATA_PATH
+from constants import LABELS_PATH
+
+
+IMPORTED = "imported"
+VERIFIED = "verified"
+HUMAN = "human"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    full_id TEXT NOT NULL,
+    crime_type TEXT NOT NULL,
+    result_type TEXT NOT NULL,
+    source TEXT NOT NULL,
+    labeled_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_full_id ON history (full_id);
+CREATE TABLE IF NOT EXISTS labels (
+    full_id TEXT PRIMARY KEY,
+    crime_type TEXT NOT NULL,
+    result_type TEXT NOT NULL,
+    source TEXT NOT NULL,
+    labeled_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS synced (
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+"""
+
+# Bytes of the training data file hashed at a time
+SYNC_CHUNK_SIZE = 1 << 20
+
+CONNECTION = None
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Returns the connection to the label store, syncing
+    it with the training data file when first opened.
+    """
+    global CONNECTION
+    if CONNECTION is None:
+        CONNECTION = sqlite3.connect(LABELS_PATH)
+        CONNECTION.executescript(SCHEMA)
+        sync_labels(CONNECTION)
+    return CONNECTION
+
+
+def read_training_labels(training_path: str = FULL_TRAIN_DATA_PATH) -> Dict[str, Tuple[str, str]]:
+    """
+    Returns the (crime_type, result_type) of each full_id in the training data file.
+    """
+    if not os.path.exists(training_path):
+        return {}
+    with open(training_path) as f:
+        return parse_training_lines(f)
+
+
+def parse_training_lines(lines: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+    """
+    Returns the (crime_type, result_type) of each full_id in the
+    training data lines, the last one given when it is repeated.
+    """
+    labels = {}
+    for line in lines:
+        fields = line.strip().split(";")
+        if len(fields) == 3:
+            labels[fields[0]] = (fields[1], fields[2])
+    return labels
+
+
+def sync_labels(connection: sqlite3.Connection):
+    """
+    Makes the labels in use those of the training data file. Labels
+    changed or added to it outside of the store are recorded as imported,
+    and full_ids removed from it are no longer labelled.
+
+    When the part of the file synced last time is unchanged, only the
+    lines appended after it are read. Otherwise the whole file is.
+    An unterminated last line is synced but left out of the synced
+    part, to be read again once it is completed.
+    """
+    if not os.path.exists(FULL_TRAIN_DATA_PATH):
+        return
+    synced = connection.execute("SELECT size, digest FROM synced").fetchone()
+    digest = blake2b()
+    with open(FULL_TRAIN_DATA_PATH, "rb") as f:
+        offset = 0
+        if synced is not None and os.fstat(f.fileno()).st_size >= synced[0]:
+            while offset < synced[0]:
+                chunk = f.read(min(SYNC_CHUNK_SIZE, synced[0] - offset))
+                digest.update(chunk)
+                offset += len(chunk)
+        if synced is None or digest.hexdigest() != synced[1]:
+            f.seek(0)
+            digest = blake2b()
+            offset = 0
+        data = f.read()
+    complete = data.rfind(b"\n") + 1
+    digest.update(data[:complete])
+    labels = parse_training_lines(data.decode().splitlines())
+
+    now = datetime.utcnow().isoformat()
+    with connection:
+        for full_id, label in labels.items():
+            cursor = connection.execute(
+                "INSERT INTO labels VALUES (?, ?, ?, ?, ?) ON CONFLICT (full_id) DO UPDATE SET "
+                "crime_type = excluded.crime_type, result_type = excluded.result_type, "
+                "source = excluded.source, labeled_at = excluded.labeled_at "
+                "WHERE crime_type != excluded.crime_type OR result_type != excluded.result_type",
+                (full_id, *label, IMPORTED, now)
+            )
+            if cursor.rowcount:
+                connection.execute("INSERT INTO history VALUES (?, ?, ?, ?, ?)", (full_id, *label, IMPORTED, now))
+        if offset == 0:
+            removed = [(full_id,) for (full_id,) in connection.execute("SELECT full_id FROM labels") if full_id not in labels]
+            connection.executemany("DELETE FROM labels WHERE full_id = ?", removed)
+        connection.execute("DELETE FROM synced")
+        connection.execute("INSERT INTO synced VALUES (?, ?)", (offset + complete, digest.hexdigest()))
+
+
+def add_labels(data_path: str, source: str):
+    """
+    Records the labels of a full_id;crime_type;result_type .csv file
+    in the history and appends the ones of full_ids not in the training
+    data file yet to it. Labels of full_ids already in it are left as
+    they are, showing as conflicts if they differ.
+    """
+    with open(data_path) as f:
+        rows = [line.strip().split(";") for line in f]
+    rows = [row for row in rows if len(row) == 3]
+
+    connection = get_connection()
+    now = datetime.utcnow().isoformat()
+    new_rows = []
+    with connection:
+        for row in rows:
+            connection.execute("INSERT INTO history VALUES (?, ?, ?, ?, ?)", (*row, source, now))
+            cursor = connection.execute(
+                "INSERT INTO labels VALUES (?, ?, ?, ?, ?) ON CONFLICT (full_id) DO NOTHING",
+                (*row, source, now)
+            )
+            if cursor.rowcount:
+                new_rows.append(row)
+        append_training_lines([";".join(row) for row in new_rows])
+    sync_labels(connection)
+    print(f"Added {len(new_rows)} {source} labels to {FULL_TRAIN_DATA_PATH}, {len(rows) - len(new_rows)} were already there")
+    print_conflicts()
+
+
+def append_training_lines(lines: List[str], filepath: str = FULL_TRAIN_DATA_PATH):
+    """
+    Appends the lines to the training data file, starting on a new line.
+    """
+    if not lines:
+        return
+    with open(filepath, "ab+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        f.write(("\n".join(lines) + "\n").encode())
+
+
+def get_conflicts() -> List[Tuple[str, str, str, str, str]]:
+    """
+    Returns the history of the full_ids given different labels,
+    as (full_id, crime_type, result_type, source, labeled_at) tuples.
+    """
+    cursor = get_connection().execute(
+        "SELECT * FROM history WHERE full_id IN ("
+        "SELECT full_id FROM history GROUP BY full_id "
+        "HAVING COUNT(DISTINCT crime_type || ';' || result_type) > 1"
+        ") ORDER BY full_id, labeled_at"
+    )
+    return cursor.fetchall()
+
+
+def print_conflicts():
+    conflicts = get_conflicts()
+    if not conflicts:
+        return
+    print(f"\n{len({row[0] for row in conflicts})} verdicts have conflicting labels:")
+    for full_id, crime_type, result_type, source, labeled_at in conflicts:
+        print(f"{full_id};{crime_type};{result_type} ({source}, {labeled_at})")
+
+
+def print_labels():
+    """
+    Prints how many labels in use come from each source and the conflicts.
+    """
+    cursor = get_connection().execute("SELECT source, COUNT(*) FROM labels GROUP BY source")
+    for source, count in cursor:
+        print(f"{source}: {count}")
+    print_conflicts()
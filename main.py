@@ -8,32 +8,61 @@ python main.py <command>
 Available commands:
 
 - scrap
+- parsers
+- tokenizers
+- features
 - merge
+- catalogue
 - download
+- standin
+- pack
 - human
+- labels
+- train
 - classify
+- bench
+- startup
+- serve
 - verify
+
+Each command imports only the modules it needs when it runs,
+so light commands don't pay for loading nltk, pandas or sklearn.
 """
 
 from datetime import datetime
 import argparse
 import sys
 
-from classify import classify
-from classify import human
+from catalogue import catalogue_exists
+from constants import BASE_URL
+from constants import BATCH_SIZE
+from constants import BENCH_SIZES
 from constants import COURTS
-from csv_utils import merge_csvs
-from scrap import scrap
+from constants import DOWNLOAD_CONCURRENCY
+from constants import DOWNLOAD_RATE
+from constants import FEATURE_MODE
+from constants import FEATURE_MODES
+from constants import MEMBER_JOBS
+from constants import MODEL_PATH
+from constants import SERVE_MAX_WAIT
+from constants import SERVE_PORT
+from constants import STANDIN_PORT
+from constants import TOKENIZER
+from constants import TRAIN_JOBS
+from profiling import run_profiled
 
 
-COMMANDS = ["scrap", "merge", "download", "human", "classify"]
+COMMANDS = ["scrap", "parsers", "tokenizers", "features", "merge", "catalogue", "download", "standin", "pack", "human", "labels", "train", "classify", "bench", "startup", "serve"]
 
 
 def main():
     parser = argparse.ArgumentParser(description="Usage: python main.py command")
     parser = register_args(parser)
     args = validate_args(parser)
-    switch_args(args)
+    if args.profile or args.cprofile:
+        run_profiled(args.command, lambda: switch_args(args), args.cprofile)
+    else:
+        switch_args(args)
 
 
 def register_args(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
@@ -45,6 +74,31 @@ def register_args(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
     parser.add_argument("--state", type=int, default=int(datetime.utcnow().timestamp()), help=f"Random state, defaults to timestamp")
     parser.add_argument("--train", type=str, default="", help=f"Name of the training data file")
     parser.add_argument("--trainsize", type=float, default=0.75, help=f"Size of the training set. Must be between 0 and 1")
+    parser.add_argument("--concurrency", type=int, default=DOWNLOAD_CONCURRENCY, help=f"Verdicts downloaded at once, defaults to {DOWNLOAD_CONCURRENCY}")
+    parser.add_argument("--rate", type=float, default=DOWNLOAD_RATE, help=f"Max download requests per second, defaults to {DOWNLOAD_RATE}")
+    parser.add_argument("--baseurl", type=str, default=BASE_URL, help=f"Base url of the scrap and downloads, defaults to {BASE_URL}")
+    parser.add_argument("--incremental", action="store_true", help=f"Merge only the raw files added since the last merge, or train only on the labels added since the last training")
+    parser.add_argument("--replay", action="store_true", help=f"Parse the archived search pages again instead of scraping")
+    parser.add_argument("--port", type=int, default=0, help=f"Port of the stand-in server or the classification service, defaults to {STANDIN_PORT} and {SERVE_PORT}")
+    parser.add_argument("--maxwait", type=float, default=SERVE_MAX_WAIT, help=f"Max seconds the classification service waits to batch documents, defaults to {SERVE_MAX_WAIT}")
+    parser.add_argument("--latency", type=float, default=0, help=f"Seconds the stand-in server waits before each response")
+    parser.add_argument("--errors", type=float, default=0, help=f"Share of stand-in server responses failing with 503")
+    parser.add_argument("--workers", type=int, default=1, help=f"Processes used to classify the corpus, defaults to 1")
+    parser.add_argument("--compress", action="store_true", help=f"Compress each verdict when packing the corpus")
+    parser.add_argument("--model", type=str, default="", help=f"Path of the saved models, retrained only when the training data changes")
+    parser.add_argument("--resume", action="store_true", help=f"Resume the latest interrupted classification output")
+    parser.add_argument("--unclassified", action="store_true", help=f"Classify only the catalogued verdicts never classified")
+    parser.add_argument("--cascade", action="store_true", help=f"Vote from the cheapest classifier, skipping the votes of documents that can no longer reach the confidence, which are few")
+    parser.add_argument("--tokenizer", type=str, default=TOKENIZER, choices=["nltk", "regex"], help=f"Tokenizer of the verdicts texts, defaults to {TOKENIZER}")
+    parser.add_argument("--features", type=str, default=FEATURE_MODE, choices=FEATURE_MODES, help=f"Features of the classifiers, the vocabulary words or the hashed tokens, defaults to {FEATURE_MODE}")
+    parser.add_argument("--trainjobs", type=int, default=TRAIN_JOBS, help=f"Threads training the classifiers at once, defaults to {TRAIN_JOBS} (every cpu)")
+    parser.add_argument("--njobs", type=int, default=MEMBER_JOBS, help=f"n_jobs of the classifiers supporting it, defaults to {MEMBER_JOBS}")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help=f"Documents classified at once, defaults to {BATCH_SIZE}")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCH_SIZES, help=f"Synthetic corpus sizes benchmarked, defaults to {BENCH_SIZES}")
+    parser.add_argument("--bench", type=str, nargs="+", default=[], help=f"Benchmarks run, defaults to all of them")
+    parser.add_argument("--profile", action="store_true", help=f"Record the time and memory of each pipeline stage in a .json report")
+    parser.add_argument("--cprofile", action="store_true", help=f"Profile the command and also save a cProfile .prof dump")
+    parser.add_argument("--baseline", type=str, default="", help=f"Benchmark results .json file to compare the new results to")
     return parser
 
 
@@ -68,31 +122,148 @@ def validate_args(parser: argparse.ArgumentParser) -> argparse.Namespace:
         print("Train size must be between 0 and 1")
         sys.exit(3)
 
+    if args.concurrency < 1 or args.rate <= 0:
+        print("Concurrency and rate must be greater than 0")
+        sys.exit(3)
+
+    if args.workers < 1:
+        print("Workers must be greater than 0")
+        sys.exit(3)
+
+    if args.unclassified and not catalogue_exists():
+        print("The catalogue must be built to classify unclassified verdicts")
+        sys.exit(3)
+
+    if args.trainjobs == 0 or args.njobs == 0:
+        print("Train jobs and n_jobs must not be 0")
+        sys.exit(3)
+
+    if args.batch < 1:
+        print("Batch size must be greater than 0")
+        sys.exit(3)
+
+    if args.command == "bench":
+        from bench.benchmarks import BENCHMARKS
+        if min(args.sizes) < 1 or any(name not in BENCHMARKS for name in args.bench):
+            print(f"Benchmark sizes must be greater than 0 and benchmarks among {list(BENCHMARKS)}")
+            sys.exit(3)
+
     return args
 
 
 def switch_args(args: argparse.Namespace):
+    if args.tokenizer != TOKENIZER:
+        from classify.Verdict import set_tokenizer
+        set_tokenizer(args.tokenizer)
+    if args.features != FEATURE_MODE:
+        from classify.features import set_feature_mode
+        set_feature_mode(args.features)
+
     if args.command == "scrap":
-        if args.court:
-            scrap.search_court_from_page(args.court, args.page)
+        from scrap import scrap
+        if args.replay:
+            scrap.replay_archive(args.court or "")
+        elif args.court:
+            scrap.search_court_from_page(args.court, args.page, args.baseurl)
         else:
-            scrap.search_all_courts()
+            scrap.search_all_courts(args.baseurl)
+
+    elif args.command == "parsers":
+        from scrap import parsecheck
+        parsecheck.check_parsers()
+
+    elif args.command == "tokenizers":
+        from classify import tokencheck
+        tokencheck.check_tokenizers()
+
+    elif args.command == "features":
+        from classify import featurecheck
+        featurecheck.check_feature_modes()
 
     elif args.command == "merge":
-        merge_csvs()
+        from csv_utils import merge_csvs
+        merge_csvs(incremental=args.incremental)
+
+    elif args.command == "catalogue":
+        from catalogue import build_catalogue
+        build_catalogue()
 
     elif args.command == "download":
-        scrap.download_all_verdicts()
+        from scrap import scrap
+        scrap.download_all_verdicts(args.concurrency, args.rate, args.baseurl)
+
+    elif args.command == "standin":
+        from scrap import standin
+        standin.serve(args.port or STANDIN_PORT, args.latency, args.errors)
+
+    elif args.command == "pack":
+        from corpus import pack_txt_dir
+        pack_txt_dir(args.compress)
 
     elif args.command == "human":
+        from classify import human
         sample = args.sample if args.sample != 0 else 50
         human.human_classification(sample, args.state)
 
+    elif args.command == "labels":
+        from labels import print_labels
+        print_labels()
+
+    elif args.command == "train":
+        from classify import classify
+        if args.incremental:
+            classify.get_models(args.train, args.trainsize, args.model or MODEL_PATH, args.trainjobs, args.njobs)
+        else:
+            classify.train(args.train, args.trainsize, args.model or MODEL_PATH, args.trainjobs, args.njobs)
+
     elif args.command == "classify":
+        from classify import classify
         if args.sample != 0:
-            classify.classify("sample", args.train, args.sample, args.state, args.trainsize)
+            classify.classify(
+                "sample",
+                args.train,
+                args.sample,
+                args.state,
+                args.trainsize,
+                args.batch,
+                args.workers,
+                args.resume,
+                args.model,
+                train_jobs=args.trainjobs,
+                member_jobs=args.njobs,
+                cascade=args.cascade
+            )
         else:
-            classify.classify("corpus", args.train)
+            classify.classify(
+                "corpus",
+                args.train,
+                batch_size=args.batch,
+                workers=args.workers,
+                resume=args.resume,
+                model_path=args.model,
+                unclassified=args.unclassified,
+                train_jobs=args.trainjobs,
+                member_jobs=args.njobs,
+                cascade=args.cascade
+            )
+
+    elif args.command == "bench":
+        from bench import benchmarks
+        results_path = benchmarks.run_benchmarks(args.sizes, args.bench)
+        if args.baseline:
+            benchmarks.compare_results(args.baseline, results_path)
+
+    elif args.command == "startup":
+        from bench import startup
+        if startup.check_startup():
+            sys.exit(4)
+
+    elif args.command == "serve":
+        from classify import classify
+        from classify import service
+        models = classify.get_models(args.train, args.trainsize, args.model or MODEL_PATH, args.trainjobs, args.njobs)
+        models[1].cascade = models[3].cascade = args.cascade
+        service.serve(args.port or SERVE_PORT, models, args.maxwait)
 
 
 if __name__ == "__main__":
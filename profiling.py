@@ -0,0 +1,128 @@
+"""
+This is a module to profile the pipeline stages.
+
+Functions decorated with profiled, and blocks run inside stage,
+record their calls, wall time, cpu time and resident memory
+high-water mark while profiling is enabled. When it is not,
+they only check a flag, so the instrumentation can stay in place.
+
+Stage times are inclusive: a stage run inside another one is
+counted in both. Cpu time is measured per thread, and the times
+of a stage run by several threads at once add up. Stages run
+inside worker processes are not recorded.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from threading import Lock
+from typing import Callable
+from typing import Dict
+import cProfile
+import json
+import os
+import resource
+import time
+
+from constants import PROFILE_DIR
+
+
+ENABLED = False
+STAGES: Dict[str, Dict[str, float]] = {}
+LOCK = Lock()
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Records the block run time as a call of the named stage.
+    """
+    if not ENABLED:
+        yield
+        return
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start, start_cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start, time.thread_time() - start_cpu, rss)
+
+
+def profiled(name: str) -> Callable:
+    """
+    Decorates a function so each call of it is recorded as a call of the named stage.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name: str, wall: float, cpu: float, start_rss: int):
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with LOCK:
+        stats = STAGES.setdefault(name, {
+            "calls": 0,
+            "wall_seconds": 0.0,
+            "cpu_seconds": 0.0,
+            "peak_rss_kb": 0,
+            "rss_growth_kb": 0,
+        })
+        stats["calls"] += 1
+        stats["wall_seconds"] += wall
+        stats["cpu_seconds"] += cpu
+        stats["peak_rss_kb"] = max(stats["peak_rss_kb"], peak_rss)
+        stats["rss_growth_kb"] += peak_rss - start_rss
+
+
+def run_profiled(command: str, run: Callable[[], None], with_cprofile: bool = False) -> str:
+    """
+    Runs the command with profiling enabled and saves the stages
+    report as .json in PROFILE_DIR, along with a cProfile .prof
+    dump if with_cprofile. Returns the report path.
+    """
+    global ENABLED
+    ENABLED = True
+    STAGES.clear()
+    started_at = datetime.utcnow().isoformat()
+    profile = cProfile.Profile() if with_cprofile else None
+    try:
+        with stage(command):
+            if profile is not None:
+                profile.enable()
+            try:
+                run()
+            finally:
+                if profile is not None:
+                    profile.disable()
+    finally:
+        ENABLED = False
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    now = str(datetime.utcnow().timestamp()).replace(".", "")
+    report_path = os.path.join(PROFILE_DIR, f"profile_{command}_{now}.json")
+    with open(report_path, "w") as f:
+        json.dump({"command": command, "started_at": started_at, "stages": STAGES}, f, indent=2)
+    print_report()
+    print(f"Profile saved at {report_path}")
+
+    if profile is not None:
+        dump_path = report_path.replace(".json", ".prof")
+        profile.dump_stats(dump_path)
+        print(f"cProfile stats saved at {dump_path}")
+    return report_path
+
+
+def print_report():
+    print("\nstage: calls, wall s, cpu s, peak rss kB")
+    for name, stats in sorted(STAGES.items(), key=lambda item: -item[1]["wall_seconds"]):
+        print(
+            f"{name}: {stats['calls']}, {stats['wall_seconds']:.3f}, "
+            f"{stats['cpu_seconds']:.3f}, {stats['peak_rss_kb']}"
+        )
@@ -0,0 +1,48 @@
+"""
+This module provides the AdaptiveLimiter class which is used
+to adapt the number of concurrent requests to the server health.
+"""
+
+from threading import Condition
+
+
+class AdaptiveLimiter:
+    """
+    Limits the requests in flight, halving the limit whenever the
+    server answers with 429 or 5xx (or not at all) and raising it
+    by one after limit requests in a row succeed.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = min(max(initial, minimum), maximum)
+        self.in_flight = 0
+        self.successes = 0
+        self.condition = Condition()
+
+    def acquire(self):
+        """
+        Blocks until there is room for one more request in flight.
+        """
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, status: int):
+        """
+        Frees the request slot and adapts the limit to the response status.
+        A status of 0 means there was no response.
+        """
+        with self.condition:
+            self.in_flight -= 1
+            if status == 0 or status == 429 or status >= 500:
+                self.limit = max(self.minimum, self.limit // 2)
+                self.successes = 0
+            else:
+                self.successes += 1
+                if self.successes >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self.successes = 0
+            self.condition.notify_all()
@@ -0,0 +1,33 @@
+"""
+This module provides the TokenBucket class which is used
+to limit the rate of requests shared by many threads.
+"""
+
+from threading import Lock
+import time
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        Tokens are refilled at rate per second, up to capacity.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,57 @@
+"""
+This module stores the raw search pages, gzip compressed,
+in HTML_DIR/<court_name>/<page>.html.gz, so they can be
+parsed again without requesting the search page.
+"""
+
+from typing import List
+import gzip
+import os
+
+from constants import HTML_DIR
+
+
+def get_archive_path(court_name: str, page: int) -> str:
+    return os.path.join(HTML_DIR, court_name, f"{page}.html.gz")
+
+
+def archive_page(court_name: str, page: int, text: str):
+    """
+    Saves the raw search page. The file is written aside
+    and then renamed so readers never see a partial file.
+    """
+    filepath = get_archive_path(court_name, page)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmppath = f"{filepath}.{os.getpid()}.tmp"
+    with gzip.open(tmppath, "wt") as f:
+        f.write(text)
+    os.replace(tmppath, filepath)
+
+
+def read_archived_page(court_name: str, page: int) -> str:
+    """
+    Returns the archived search page, or None if it was never archived.
+    """
+    filepath = get_archive_path(court_name, page)
+    if not os.path.exists(filepath):
+        return None
+    with gzip.open(filepath, "rt") as f:
+        return f.read()
+
+
+def get_archived_courts() -> List[str]:
+    if not os.path.isdir(HTML_DIR):
+        return []
+    return sorted(d for d in os.listdir(HTML_DIR) if os.path.isdir(os.path.join(HTML_DIR, d)))
+
+
+def get_archived_pages(court_name: str) -> List[int]:
+    """
+    Returns the archived page numbers of the court, in ascending order,
+    or an empty list if it was never archived.
+    """
+    folder = os.path.join(HTML_DIR, court_name)
+    if not os.path.isdir(folder):
+        return []
+    pages = [f.replace(".html.gz", "") for f in os.listdir(folder) if f.endswith(".html.gz")]
+    return sorted(int(p) for p in pages if p.isdigit())
@@ -0,0 +1,119 @@
+"""
+This module checks the parser engines against each other
+on the saved search pages and benchmarks each of them.
+Synthetic search pages are checked when none are saved.
+
+Every engine must produce the exact same ';' separated
+rows as the reference bs4 engine for every saved page.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+from typing import List
+from typing import Tuple
+import gzip
+import os
+import resource
+import time
+import tracemalloc
+
+from bench.synthetic import generate_search_pages
+from constants import HTML_DIR
+from constants import PARSECHECK_SYNTHETIC_RESULTS
+from scrap.parsers import ENGINES
+from scrap.scrap import parse_page
+
+
+SavedPage = Tuple[str, str, str]
+
+
+def load_saved_pages(folder: str = HTML_DIR) -> List[SavedPage]:
+    """
+    Returns the (path, court_name, page) of the .html and .html.gz
+    pages saved under folder. The court name is the page directory name.
+    """
+    pages = []
+    for dirpath, _, files in os.walk(folder):
+        court_name = os.path.basename(dirpath) if dirpath != folder else ""
+        for _file in sorted(files):
+            path = os.path.join(dirpath, _file)
+            if _file.endswith(".html.gz"):
+                with gzip.open(path, "rt") as f:
+                    pages.append((path, court_name, f.read()))
+            elif _file.endswith(".html"):
+                with open(path) as f:
+                    pages.append((path, court_name, f.read()))
+    return pages
+
+
+def compare_engines(pages: List[SavedPage], reference: str = "bs4") -> int:
+    """
+    Parses every page with each engine and prints where their
+    rows differ from the reference engine ones.
+    Returns the number of differing pages.
+    """
+    differences = 0
+    for path, court_name, page in pages:
+        expected = parse_page(page, court_name, reference)
+        for engine in ENGINES:
+            rows = parse_page(page, court_name, engine)
+            if rows == expected:
+                continue
+            differences += 1
+            first = next((i for i, pair in enumerate(zip(rows, expected)) if pair[0] != pair[1]), min(len(rows), len(expected)))
+            print(f"{engine} differs from {reference} on {path} at row #{first}")
+    return differences
+
+
+def benchmark_engine(engine: str, pages: List[SavedPage], rounds: int) -> Dict[str, float]:
+    """
+    Parses the pages rounds times and returns the pages parsed per second,
+    the peak Python memory and the peak resident memory growth of parsing.
+    Runs in its own process, so each engine memory is measured alone.
+    """
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, court_name, page in pages:
+            parse_page(page, court_name, engine)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    for _, court_name, page in pages:
+        parse_page(page, court_name, engine)
+    _, peak_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pages_per_sec": len(pages) * rounds / elapsed if elapsed else 0,
+        "peak_python_kb": peak_python / 1024,
+        "peak_rss_growth_kb": peak_rss - baseline_rss,
+    }
+
+
+def check_parsers(folder: str = HTML_DIR, rounds: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Compares and benchmarks the parser engines on the pages saved under
+    folder, or on synthetic ones if there are none.
+    Returns the benchmark results of each engine.
+    """
+    pages = load_saved_pages(folder)
+    if not pages:
+        print(f"No saved search pages found in {folder}, checking synthetic ones")
+        pages = [(f"synthetic page #{i}", "", page) for i, page in enumerate(generate_search_pages(PARSECHECK_SYNTHETIC_RESULTS))]
+
+    differences = compare_engines(pages)
+    print(f"{len(pages)} pages compared, {differences} differences found")
+
+    results = {}
+    for engine in ENGINES:
+        with ProcessPoolExecutor(1) as executor:
+            results[engine] = executor.submit(benchmark_engine, engine, pages, rounds).result()
+        r = results[engine]
+        print(
+            f"{engine}: {r['pages_per_sec']:.1f} pages/s, "
+            f"peak python memory {r['peak_python_kb']:.0f} kB, "
+            f"peak rss growth {r['peak_rss_growth_kb']:.0f} kB"
+        )
+    return results
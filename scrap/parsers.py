@@ -0,0 +1,78 @@
+"""
+This module provides the engines used to extract the results
+from a verdicts search page.
+
+Each engine returns, for each result, the raw texts of its old
+number, cnj number, judge and publication date, and the onclick
+attribute of its download image. bs4 is the reference engine.
+lxml, when installed, is the faster default engine.
+"""
+
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import bs4
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+RawResult = Tuple[str, str, str, str, str]
+
+
+def extract_with_bs4(page: str) -> List[RawResult]:
+    soup = bs4.BeautifulSoup(page, "html.parser")
+    nums = group_pairs_as_tuples(soup.select("#tabelaSentenca .caixa_processo a div"))
+    desc = group_pairs_as_tuples(soup.select("#tabelaSentenca .corpo"))
+    imgs = soup.select("#tabelaSentenca span img")
+    return [
+        (num[0].getText(), num[1].getText(), desc[0].getText(), desc[1].getText(), img["onclick"])
+        for num, desc, img in zip(nums, desc, imgs)
+    ]
+
+
+def has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+NUMS_XPATH = f"//*[@id='tabelaSentenca']//*[{has_class('caixa_processo')}]//a//div"
+DESC_XPATH = f"//*[@id='tabelaSentenca']//*[{has_class('corpo')}]"
+IMGS_XPATH = "//*[@id='tabelaSentenca']//span//img"
+
+
+def extract_with_lxml(page: str) -> List[RawResult]:
+    """
+    Same as extract_with_bs4, with the css selectors
+    translated to xpath and evaluated by libxml2.
+    """
+    tree = lxml.html.fromstring(page)
+    nums = group_pairs_as_tuples(tree.xpath(NUMS_XPATH))
+    desc = group_pairs_as_tuples(tree.xpath(DESC_XPATH))
+    imgs = tree.xpath(IMGS_XPATH)
+    return [
+        (num[0].text_content(), num[1].text_content(), desc[0].text_content(), desc[1].text_content(), img.attrib["onclick"])
+        for num, desc, img in zip(nums, desc, imgs)
+    ]
+
+
+def group_pairs_as_tuples(elements: List) -> List[Tuple]:
+    """
+    Groups pairs of contiguous related html elements into tuples.
+    """
+    return [(elements[i], elements[i+1]) for i in range(len(elements) - 1) if i % 2 == 0]
+
+
+ENGINES: Dict[str, Callable[[str], List[RawResult]]] = {"bs4": extract_with_bs4}
+if lxml is not None:
+    ENGINES["lxml"] = extract_with_lxml
+
+
+def get_engine(name: str) -> Callable[[str], List[RawResult]]:
+    """
+    Returns the named engine, falling back to bs4 if it is not available.
+    """
+    return ENGINES.get(name, extract_with_bs4)
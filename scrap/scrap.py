@@ -12,41 +12,74 @@ to filter a specific time frame and scrap your
 data within that time frame.
 """
 
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from typing import Tuple
 from typing import Union
 import time
 
-import bs4
-import os
 import requests
-
+import requests.adapters
+
+from catalogue import DOWNLOAD_FAILED
+from catalogue import DOWNLOADED
+from catalogue import catalogue_exists
+from catalogue import get_pending_downloads
+from catalogue import set_download_state
+from catalogue import upsert_verdicts
 from constants import BASE_URL
 from constants import COUNTY
 from constants import COURTS
 from constants import CSV_DATA_PATH
+from constants import DOWNLOAD_CONCURRENCY
+from constants import DOWNLOAD_RATE
 from constants import EMPTY_RESULT
 from constants import MAX_RETRIES
+from constants import REQUEST_TIMEOUT
+from constants import PARSER_ENGINE
+from constants import PREFETCH_PAGES
 from constants import RAW_DIR
 from constants import RETRY_WAIT_SECS
 from constants import QUERY
-from constants import TXT_DIR
+from constants import SEARCH_CONCURRENCY
+from constants import SEARCH_MAX_CONCURRENCY
+from corpus import has_verdict
+from corpus import save_verdict
 from csv_utils import save_list_as_csv
 from my_logs import LogServices
 from my_logs import log_err
-
-
-def search_all_courts():
+from profiling import profiled
+from profiling import stage
+from scrap.AdaptiveLimiter import AdaptiveLimiter
+from scrap.archive import archive_page
+from scrap.archive import get_archived_courts
+from scrap.archive import get_archived_pages
+from scrap.archive import read_archived_page
+from scrap.parsers import get_engine
+from scrap.TokenBucket import TokenBucket
+
+
+def search_all_courts(base_url: str = BASE_URL):
     """
-    Iterates though all courts listed in the COURTS dict
-    to scrap data related to that specific court in the
-    verdict search page using query params as filters.
+    Scraps all courts listed in the COURTS dict at the same
+    time, each one in its own thread, to scrap data related to
+    that specific court in the verdict search page using query
+    params as filters. All requests share one connection pool
+    and one adaptive concurrency limit.
     """
-    for court_name, court_id in COURTS.items():
-        search(court_id, court_name)
+    session, limiter, fetcher = get_search_clients()
+    with fetcher, ThreadPoolExecutor(len(COURTS)) as executor:
+        searches = [
+            executor.submit(search, court_id, court_name, 0, session, limiter, fetcher, base_url)
+            for court_name, court_id in COURTS.items()
+        ]
+        for future in searches:
+            future.result()
 
 
-def search_court_from_page(court_name: str, page: int = 0):
+def search_court_from_page(court_name: str, page: int = 0, base_url: str = BASE_URL):
     """
     Scraps data from a specific court starting from a specific page.
     Starting page defaults to 0.
@@ -55,48 +88,116 @@ def search_court_from_page(court_name: str, page: int = 0):
     if court_id is None:
         print("Court not available.")
         return
-    search(court_id, court_name, page)
+    session, limiter, fetcher = get_search_clients()
+    with fetcher:
+        search(court_id, court_name, page, session, limiter, fetcher, base_url)
 
 
-def search(court_id: str, court_name: str, page: int = 0):
+def get_search_clients() -> Tuple[requests.Session, AdaptiveLimiter, ThreadPoolExecutor]:
+    """
+    Returns the connection pool, the adaptive concurrency limit and
+    the thread pool used to fetch the search pages.
+    """
+    session = get_session(SEARCH_MAX_CONCURRENCY)
+    limiter = AdaptiveLimiter(SEARCH_CONCURRENCY, SEARCH_MAX_CONCURRENCY)
+    fetcher = ThreadPoolExecutor(SEARCH_MAX_CONCURRENCY)
+    return session, limiter, fetcher
+
+
+def search(
+    court_id: str,
+    court_name: str,
+    page: int,
+    session: requests.Session,
+    limiter: AdaptiveLimiter,
+    fetcher: ThreadPoolExecutor,
+    base_url: str = BASE_URL
+):
     """
     Iterates through the search pages until all results are scrapped.
     In case of https request errors, this breaks after MAX_RETRIES retries on the same endpoint.
     """
     print(f"Now scraping data from: {court_name}")
-    last_visited_page = walk_search(court_id, court_name, page)
+    last_visited_page = walk_search(court_id, court_name, page, session, limiter, fetcher, base_url)
     while last_visited_page != 0:
-        last_visited_page = walk_search(court_id, court_name, last_visited_page)
-
-
-def walk_search(court_id: str, court_name: str, page: int = 0) -> int:
+        last_visited_page = walk_search(court_id, court_name, last_visited_page, session, limiter, fetcher, base_url)
+
+
+def walk_search(
+    court_id: str,
+    court_name: str,
+    page: int,
+    session: requests.Session,
+    limiter: AdaptiveLimiter,
+    fetcher: ThreadPoolExecutor,
+    base_url: str = BASE_URL
+) -> int:
     """
     Walks through all pages of the verdicts search,
     starting from <page>, until it reachs a page with
     no results, when it assumes the search as over and returns 0.
 
+    The next PREFETCH_PAGES pages are requested ahead in the fetcher
+    threads, but pages are still parsed and saved in order.
+    Each page with results is archived before being parsed.
+
     If an error occurs in a request, this function returns
     the number of the last visited page so you can try again.
     """
-    while True:
-        print(f"Getting page #{page}")
-        search_url = get_search_url(court_id, page)
-        res = get_page(search_url)
+    def fetch(page_number: int) -> Future:
+        search_url = get_search_url(court_id, page_number, base_url)
+        return fetcher.submit(get_page, search_url, session, None, limiter)
+
+    prefetched = deque(fetch(p) for p in range(page, page + PREFETCH_PAGES + 1))
+    try:
+        while True:
+            print(f"Getting {court_name} page #{page}")
+            res = prefetched.popleft().result()
 
-        if res is None:
-            return page
+            if res is None:
+                return page
 
-        if EMPTY_RESULT in res.text:
-            print("Got no result. Is the search over?")
-            return 0
+            if EMPTY_RESULT in res.text:
+                print(f"Got no result for {court_name}. Is the search over?")
+                return 0
 
-        page_data = parse_page(res.text, court_name)
-        save_list_as_csv(RAW_DIR, "raw", page_data)
+            archive_page(court_name, page, res.text)
+            save_page_data(court_name, parse_page(res.text, court_name))
 
-        page += 1
+            page += 1
+            prefetched.append(fetch(page + PREFETCH_PAGES))
+    finally:
+        for future in prefetched:
+            future.cancel()
 
 
-def get_search_url(court: str, page: int) -> str:
+def save_page_data(court_name: str, page_data: List[str]):
+    """
+    Saves the parsed search results in a raw csv file and in the catalogue, if there is one.
+    """
+    save_list_as_csv(RAW_DIR, f"raw_{court_name}", page_data)
+    if catalogue_exists():
+        upsert_verdicts(page_data)
+
+
+def replay_archive(court_name: str = ""):
+    """
+    Parses the archived search pages again, without requesting
+    the search page, saving their results as a scrap would.
+    Replays all archived courts unless court_name is given.
+    """
+    courts = [court_name] if court_name else get_archived_courts()
+    for court in courts:
+        pages = get_archived_pages(court)
+        if not pages:
+            print(f"Nothing archived for: {court}")
+            continue
+        print(f"Replaying {len(pages)} archived pages from: {court}")
+        for page in pages:
+            save_page_data(court, parse_page(read_archived_page(court, page), court))
+
+
+def get_search_url(court: str, page: int, base_url: str = BASE_URL) -> str:
     """
     Returns the formatted url to the verdict search page at <page> number.
     """
@@ -109,67 +210,93 @@ def get_search_url(court: str, page: int) -> str:
         f"pg={page}",
         "pesquisar=Pesquisar"
     )
-    return BASE_URL + endpoint + "&".join(query)
+    return base_url + endpoint + "&".join(query)
 
 
-def get_page(url: str) -> Union[requests.Response, None]:
+@profiled("get_page")
+def get_page(
+    url: str,
+    session: requests.Session = None,
+    bucket: TokenBucket = None,
+    limiter: AdaptiveLimiter = None
+) -> Union[requests.Response, None]:
     """
     Sends a get request to <url> and returns the response if
     the request was valid or None if the request failed.
+    Requests timing out after REQUEST_TIMEOUT seconds are retried too.
+    Requests go through the session connection pool if one is given,
+    and each try waits for a token from the bucket and for
+    room in the limiter if they are given.
     """
+    getter = session if session is not None else requests
     tries = 0
     while tries < MAX_RETRIES:
         time.sleep(tries * RETRY_WAIT_SECS) # Progressively waits after each failure
-        res = requests.get(url)
+        if bucket is not None:
+            bucket.acquire()
+        if limiter is not None:
+            limiter.acquire()
+
+        status = 0
+        try:
+            res = getter.get(url, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            res, status, content = None, 0, str(e)
+        else:
+            status, content = res.status_code, res.text
+        finally:
+            if limiter is not None:
+                limiter.release(status)
 
-        if res.ok:
+        if res is not None and res.ok:
             return res
 
         tries += 1
-        print(f"Response not ok. On try #{tries} got {res.status_code} when getting {url}")
+        print(f"Response not ok. On try #{tries} got {status} when getting {url}")
         if tries != MAX_RETRIES:
             print(f"Trying again in {tries * RETRY_WAIT_SECS} seconds.")
         else:
-            log_err(LogServices.SCRAP, f"ERR: {url}. Could not get {url}. Got status {res.status_code} and content {res.text}")
+            log_err(LogServices.SCRAP, f"ERR: {url}. Could not get {url}. Got status {status} and content {content}")
 
     return None
 
 
-def parse_page(page: str, court_name: str) -> List[str]:
+def get_session(pool_size: int) -> requests.Session:
+    """
+    Returns a session which keeps up to pool_size connections
+    alive, so they are reused across requests and threads.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def parse_page(page: str, court_name: str, engine: str = PARSER_ENGINE) -> List[str]:
     """
     Parsers the search results into a list of strings
-    formatted as a ';' separated csv.
+    formatted as a ';' separated csv, using the named parser engine.
     """
-    soup = bs4.BeautifulSoup(page, "html.parser")
-    nums = group_pairs_as_tuples(soup.select("#tabelaSentenca .caixa_processo a div"))
-    desc = group_pairs_as_tuples(soup.select("#tabelaSentenca .corpo"))
-    imgs = soup.select("#tabelaSentenca span img")
     data = []
-    for num, desc, img in zip(nums, desc, imgs):
-        old_num = num[0].getText().strip()
-        cnj_num = num[1].getText().strip().replace(".", "").replace("-", "")
-        judge = desc[0].getText().strip().split(":")[-1].strip()
-        pub_date = desc[1].getText().strip().split()[-1].strip()
-        file_id, file_hash = get_id_and_hash_from_img_tag(img)
+    for num, cnj, judge, date, onclick in get_engine(engine)(page):
+        old_num = num.strip()
+        cnj_num = cnj.strip().replace(".", "").replace("-", "")
+        judge = judge.strip().split(":")[-1].strip()
+        pub_date = date.strip().split()[-1].strip()
+        file_id, file_hash = get_id_and_hash_from_onclick(onclick)
         full_id = f"{file_id}{file_hash}"
         download_url = get_download_url(file_id, file_hash)
         data.append(";".join((court_name, old_num, cnj_num, judge, pub_date, full_id, file_id, file_hash, download_url)))
     return data
 
 
-def group_pairs_as_tuples(elements: bs4.ResultSet) -> List[Tuple[bs4.element.Tag, bs4.element.Tag]]:
+def get_id_and_hash_from_onclick(onclick: str) -> List[str]:
     """
-    Groups pairs of contiguous related html elements into tuples.
-    """
-    return [(elements[i], elements[i+1]) for i in range(len(elements) - 1) if i % 2 == 0]
-
-
-def get_id_and_hash_from_img_tag(img: bs4.element.Tag) -> List[str]:
-    """
-    Gets the file id and file hash from the imagem tag.
+    Gets the file id and file hash from the onclick attribute of the imagem tag.
     This id and hash will be used to form the verdicts download url.
     """
-    ids = img["onclick"].replace("'", "")
+    ids = onclick.replace("'", "")
     _from = ids.find("(") + 1
     until = ids.rfind(")")
     codes = ids[_from:until].split(",")
@@ -189,53 +316,106 @@ def get_download_url(file_id: str, file_hash: str) -> str:
     return BASE_URL + endpoint + "&".join(query)
 
 
-def download_all_verdicts():
+def download_all_verdicts(
+    concurrency: int = DOWNLOAD_CONCURRENCY,
+    rate: float = DOWNLOAD_RATE,
+    base_url: str = BASE_URL
+):
     """
     Downloads the text content from all the verdicts
     which info was scrapped and stored in a csv file.
+    If there is a catalogue, only the verdicts it lists
+    as not downloaded yet are requested.
+    Downloads run in concurrency threads sharing one connection
+    pool and limited to rate requests per second. Urls are
+    rebased on base_url, so they can be served by a stand-in server.
+    """
+    pending = get_pending_verdicts()
+    session = get_session(concurrency)
+    bucket = TokenBucket(rate, concurrency)
+
+    def download(verdict: Tuple[str, str]) -> bool:
+        full_id, url = verdict
+        return download_verdit(full_id, url.replace(BASE_URL, base_url, 1), session, bucket)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        downloaded = sum(executor.map(download, pending))
+    elapsed = time.perf_counter() - start
+
+    throughput = downloaded / elapsed if elapsed else 0
+    print(f"Downloaded {downloaded} of {len(pending)} verdicts in {elapsed:.1f}s ({throughput:.2f} verdicts/s)")
+
+
+def get_pending_verdicts() -> List[Tuple[str, str]]:
+    """
+    Returns the (full_id, url) of the verdicts to download.
     """
+    if catalogue_exists():
+        return get_pending_downloads()
+
     with open(CSV_DATA_PATH) as f:
         lines = f.readlines()
 
+    pending = []
     for line in lines:
-        line_data = line.split(";")
+        line_data = line.strip().split(";")
         url = line_data[-1]
         full_id = line_data[5]
-        download_verdit(full_id, url)
+        pending.append((full_id, url))
+    return pending
 
 
-def download_verdit(full_id: str, url: str):
+@profiled("download_verdit")
+def download_verdit(
+    full_id: str,
+    url: str,
+    session: requests.Session = None,
+    bucket: TokenBucket = None
+) -> bool:
     """
     Requests the url for the verdict text content and saves
-    it in a .txt file.
+    it in the corpus. Returns whether it was saved.
     If the text is empty or the verdict is stored in a .pdf
-    file it is skipped. Request errors are also skipped
-    and printed.
+    file it is skipped. Request errors are retried as in get_page,
+    then skipped and printed.
     """
-    filepath = os.path.join(TXT_DIR, f"{full_id}.txt")
-
-    if filepath in os.listdir(TXT_DIR):
+    if has_verdict(full_id):
         message = f"ERR: {full_id}. A file with that id already exists. Skipping for now"
         log_err(LogServices.SCRAP, message)
-        return
+        track_download(full_id, DOWNLOADED)
+        return False
 
     print(f"Downloading {full_id} from {url}")
-    res = requests.get(url)
+    res = get_page(url, session, bucket)
 
-    if not res.ok:
+    if res is None:
         log_err(LogServices.SCRAP, f"ERR: {full_id}. Could not get {url}. Skipping for now.")
-        return
+        return False
 
     if res.text == "":
         log_err(LogServices.SCRAP, f"ERR: {full_id}. {url} appears to be empty. Skipping for now.")
-        return
+        track_download(full_id, DOWNLOAD_FAILED)
+        return False
 
     if res.text.startswith("%PDF"):
         log_err(LogServices.SCRAP, f"ERR: {full_id}. {url} appears to be of a PDF file. Skipping for now.")
-        return
+        track_download(full_id, DOWNLOAD_FAILED)
+        return False
+
+    with stage("save_verdict"):
+        save_verdict(full_id, res.text)
+    track_download(full_id, DOWNLOADED, res.text)
+    return True
+
 
-    with open(filepath, "w") as f:
-        f.write(res.text)
+def track_download(full_id: str, state: int, text: str = ""):
+    """
+    Records the verdict download state in the catalogue, if there is one.
+    Request errors are not recorded, so they are retried in the next download.
+    """
+    if catalogue_exists():
+        set_download_state(full_id, state, text)
 
 
 if __name__ == "__main__":
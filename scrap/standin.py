@@ -0,0 +1,94 @@
+"""
+This module provides a local stand-in for the verdicts website,
+so the scrap and download can be tested and load tested without
+requesting the real server (BASE_URL).
+
+Search pages are served from the archived pages and verdicts
+from the corpus. Run it with python main.py standin and point
+the scrap or download to it with
+python main.py <command> --baseurl http://127.0.0.1:<port>/
+"""
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+import random
+import time
+
+from constants import COURTS
+from constants import EMPTY_RESULT
+from corpus import has_verdict
+from corpus import read_verdict
+from scrap.archive import read_archived_page
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        if random.random() < self.server.error_rate:
+            self.reply(503, "Service unavailable")
+            return
+
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path.endswith("downloadArquivo.do"):
+            self.reply(200, get_verdict_text(query.get("codigoArquivo", ""), query.get("hashArquivo", "")))
+        elif url.path.endswith("sentenca.do"):
+            self.reply(200, get_search_page(query.get("codigoOrgaoJulgador", ""), query.get("pg", "0")))
+        else:
+            self.reply(404, "Not found")
+
+    def reply(self, status: int, body: str):
+        content = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get_verdict_text(file_id: str, file_hash: str) -> str:
+    """
+    Returns the stored verdict text, or a placeholder text if it was never downloaded.
+    """
+    full_id = f"{file_id}{file_hash}"
+    if has_verdict(full_id):
+        return read_verdict(full_id)
+    return f"Sentença {full_id}. " * 200
+
+
+def get_search_page(court_id: str, page: str) -> str:
+    """
+    Returns the archived search page, or an empty result page
+    past the last archived one, as the real search page does.
+    """
+    court_names = {v: k for k, v in COURTS.items()}
+    archived = None
+    if court_id in court_names and page.isdigit():
+        archived = read_archived_page(court_names[court_id], int(page))
+    return archived if archived is not None else f"<html><body>{EMPTY_RESULT}</body></html>"
+
+
+def get_server(port: int, latency: float = 0, error_rate: float = 0) -> ThreadingHTTPServer:
+    """
+    Returns the stand-in server, which waits latency seconds before each
+    response and fails a share of error_rate of the requests with a 503.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+    server.latency = latency
+    server.error_rate = error_rate
+    return server
+
+
+def serve(port: int, latency: float = 0, error_rate: float = 0):
+    server = get_server(port, latency, error_rate)
+    print(f"Stand-in server listening on http://127.0.0.1:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()